@@ -0,0 +1,37 @@
+"""
+Report the memory of parsed datasets before and after dtype compaction.
+
+Usage (from the project root):
+    python -m benchmarks.compact_dtypes server/files/sample.csv --category-ratio 0.5
+"""
+import argparse
+
+import utils.compact_dtypes as compact_dtypes
+import utils.dataset_loader as dataset_loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Dataset files to parse")
+    parser.add_argument("--category-ratio", type=float, default=compact_dtypes.CATEGORY_MAX_RATIO,
+                        help="Max distinct/non-null ratio for categorical columns")
+    parser.add_argument("--no-arrow-strings", action="store_true", help="Keep object dtype for free text")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        data = dataset_loader.read_dataset(file_path, use_sidecar=False)
+        if data is None:
+            print(f"\n{file_path}: could not be parsed")
+            continue
+        _, report = compact_dtypes.compact_dtypes(
+            data, category_ratio=args.category_ratio, arrow_strings=not args.no_arrow_strings
+        )
+        print(f"\n{file_path} ({len(data)} rows)")
+        print(f"  before {report['before_bytes'] / 1024 / 1024:>9.2f} MB")
+        print(f"  after  {report['after_bytes'] / 1024 / 1024:>9.2f} MB  (x{report['ratio']})")
+        for name, (before, after) in report["columns"].items():
+            print(f"    {name:<30} {before} -> {after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare read times of compressed and uncompressed dataset storage.
+
+Each file is stored once per codec in a temporary directory and parsed with the
+loader (sidecar disabled), so the numbers show the decompression cost against the
+bytes saved.
+
+Usage (from the project root):
+    python -m benchmarks.compression server/files/sample.csv --codecs none gzip zstd
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import utils.compression as compression
+import utils.dataset_loader as dataset_loader
+
+
+def time_read(file_path, engine, repeat):
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = dataset_loader.read_dataset(file_path, engine=engine, use_sidecar=False)
+        elapsed = time.perf_counter() - start
+        rows = len(data) if data is not None else 0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Uncompressed CSV/TXT/JSON files")
+    parser.add_argument("--codecs", nargs="*", default=["none", "gzip", "zstd"], help="Codecs to compare")
+    parser.add_argument("--engine", default=None, help="Parse engine (default: the configured one)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per codec, the best one is reported")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="compression-bench-")
+    try:
+        for file_path in args.files:
+            raw_size = os.path.getsize(file_path)
+            print(f"\n{file_path} ({raw_size / 1024 / 1024:.1f} MB)")
+            baseline = None
+            for codec in args.codecs:
+                if codec == "zstd" and not compression.ZSTD_AVAILABLE:
+                    print(f"  {codec:<6} skipped, zstandard is not installed")
+                    continue
+                target = os.path.join(workdir, f"{codec}-{os.path.basename(file_path)}")
+                compression.compress_file(file_path, target, codec=codec)
+                seconds, rows = time_read(target, args.engine, args.repeat)
+                baseline = baseline or seconds
+                ratio = raw_size / os.path.getsize(target)
+                print(f"  {codec:<6} {seconds:>8.3f}s  x{seconds / baseline:.2f} time  "
+                      f"{ratio:>5.1f}x smaller  {rows} rows")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
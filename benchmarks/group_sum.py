@@ -0,0 +1,72 @@
+"""
+Compare the factorize + bincount group sum against pandas groupby on synthetic columns.
+
+The groupby side also sorts its result to get the same top groups and "Other" total,
+so both produce what find_sum returns. Results are checked to match before timing.
+
+Usage (from the project root):
+    python -m benchmarks.group_sum --rows 5000000 --cardinalities 10 1000 100000 1000000
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import utils.group_kernel as group_kernel
+
+
+def groupby_top(keys, values, k):
+    sums = values.groupby(keys, observed=True).sum().sort_values(ascending=False, kind="stable")
+    return sums.head(k), sums.iloc[k:].sum()
+
+
+def best_of(repeat, function, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_column(rows, cardinality, kind, rng):
+    codes = rng.integers(0, cardinality, rows)
+    if kind == "int":
+        return pd.Series(codes, name="category")
+    return pd.Series(np.char.add("c", codes.astype(str)).astype(object), name="category")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows per column")
+    parser.add_argument("--cardinalities", nargs="+", type=int, default=[10, 1000, 100_000, 1_000_000],
+                        help="Distinct categories to compare")
+    parser.add_argument("--kinds", nargs="+", default=["str", "int"], choices=["str", "int"], help="Key types")
+    parser.add_argument("--top", type=int, default=group_kernel.GROUP_TOP_K, help="Groups kept")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.random(args.rows) * 1000, name="value")
+    print(f"{args.rows} rows, top {args.top}")
+    for kind in args.kinds:
+        for cardinality in args.cardinalities:
+            keys = make_column(args.rows, cardinality, kind, rng)
+
+            top, other = groupby_top(keys, values, args.top)
+            result = group_kernel.group_totals(keys, values, k=args.top)
+            kept = result["sum"].iloc[:len(top)]
+            if not np.allclose(kept, top.to_numpy()) or (len(result) > len(top) and not np.isclose(result["sum"].iloc[-1], other)):
+                print(f"  {kind:<3} {cardinality:>9}  results differ, skipped")
+                continue
+
+            baseline = best_of(args.repeat, groupby_top, keys, values, args.top)
+            kernel = best_of(args.repeat, group_kernel.group_totals, keys, values, args.top)
+            print(f"  {kind:<3} {cardinality:>9} groups  groupby {baseline:>7.3f}s  "
+                  f"kernel {kernel:>7.3f}s  x{baseline / kernel:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Compare the dataset parse engines on sample files and suggest one per format.
+
+Usage (from the project root):
+    python -m benchmarks.loader_engines server/files/sample.csv server/files/sample.json
+"""
+import argparse
+from collections import defaultdict
+
+import utils.dataset_loader as dataset_loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Dataset files to parse")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine, the best one is reported")
+    parser.add_argument("--engines", nargs="*", default=None, help="Engines to compare (default: all)")
+    args = parser.parse_args()
+
+    totals = defaultdict(lambda: defaultdict(float))
+    for file_path in args.files:
+        file_type = dataset_loader.get_file_type(file_path)
+        results = dataset_loader.benchmark_engines(file_path, engines=args.engines, repeat=args.repeat)
+        print(f"\n{file_path}")
+        for engine, result in sorted(results.items(), key=lambda item: item[1]["seconds"]):
+            print(f"  {engine:<10} {result['seconds']:>9.3f}s  {result['rows']} rows")
+            totals[file_type][engine] += result["seconds"]
+
+    print("\nSuggested engine per format:")
+    for file_type, timings in totals.items():
+        engine = min(timings, key=timings.get)
+        print(f"  DATASET_LOADER_ENGINE_{file_type.upper()}={engine}")
+
+
+if __name__ == "__main__":
+    main()
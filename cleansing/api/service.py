@@ -4,11 +4,13 @@ from utils.file_util import get_file_extension, file_server_path_file
 import logging
 import os
 import scipy.stats as stats
-import uuid
+import utils.dataset_loader as dataset_loader
+import utils.blob_store as blob_store
+from file.api.schema_service import SchemaService
 
 
 logger = logging.getLogger(__name__)
-def data_cleansing(filename):
+def data_cleansing(filename, dialect=None):
     """
     Analyze the given file for missing rows, duplicates, outliers, and data types.
     """
@@ -20,13 +22,13 @@ def data_cleansing(filename):
 
     extension = get_file_extension(filename)
     try:
-        if extension == ".csv":
-            data = pd.read_csv(file_path)
-        elif extension == ".json":
-            data = pd.read_json(file_path)
-        else:
+        if extension not in [".csv", ".json"]:
             return {"error": "Unsupported file type for cleansing."}
 
+        data = dataset_loader.load_dataframe(file_path, dialect=dialect)
+        if data is None:
+            return {"error": f"Could not load file: {filename}"}
+
         # Replace NaN with None for JSON compliance
         data = data.replace({np.nan: None})
 
@@ -72,7 +74,7 @@ def data_cleansing(filename):
         logger.error(f"Error during data cleansing: {str(e)}")
         return {"error": str(e)}
 
-def process_cleansing(filename, process_list):
+def process_cleansing(filename, process_list, dialect=None):
     """
     Cleanses the given file based on the specified processes and saves the result as a new file.
     """
@@ -84,7 +86,9 @@ def process_cleansing(filename, process_list):
 
     try:
         # Load the dataset
-        data = pd.read_csv(file_path)
+        data = dataset_loader.load_dataframe(file_path, dialect=dialect)
+        if data is None:
+            return {"error": f"Could not load file: {filename}"}
 
         # Process: Remove rows with missing values
         if "delete_missing_row" in process_list:
@@ -94,28 +98,35 @@ def process_cleansing(filename, process_list):
         if "delete_duplicate_row" in process_list:
             data = data.drop_duplicates()
 
-        # Generate random string for filename
-        random_id = str(uuid.uuid4())[:8]
         file_extension = os.path.splitext(filename)[1]
-        cleansed_filename = f"cleansed_{random_id}{file_extension}"
-        
+
         # Create the CSV directory path
         csv_dir = os.path.join(file_server_path_file, 'csv')
         
         # Create the directory if it doesn't exist
         os.makedirs(csv_dir, exist_ok=True)
         
-        # Create the full path for the cleansed file
-        cleansed_path = os.path.join(csv_dir, cleansed_filename)
-        
-        # Save the file
-        data.to_csv(cleansed_path, index=False)
+        # Save the file under its content hash, re-running the same cleansing reuses the stored copy
+        tmp_path = blob_store.temp_path(csv_dir, file_extension)
+        data.to_csv(tmp_path, index=False)
+        content_hash = blob_store.hash_file(tmp_path)
+        blob_filename, created = blob_store.commit_blob(tmp_path, csv_dir, content_hash, file_extension)
+        cleansed_path = os.path.join(csv_dir, blob_filename)
+        # The stored name keeps the directory, an upload with the same content is a different blob
+        cleansed_filename = f"csv/{blob_filename}"
+
+        cleansed_dialect = dataset_loader.detect_dialect(cleansed_path)
+        if created:
+            dataset_loader.prepare_dataset(cleansed_path, dialect=cleansed_dialect)
+            SchemaService().invalidate(cleansed_filename)
 
         logger.info(f"Cleansing completed. Saved to {cleansed_path}")
 
         return {
             "filename": cleansed_filename,
+            "content_hash": content_hash,
             "size": data.shape[0],
+            "dialect": cleansed_dialect,
             "message": "Cleansing process completed successfully."
         }
     except Exception as e:
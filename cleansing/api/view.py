@@ -13,6 +13,9 @@ from metafile.api.service import MetadataService
 from datetime import datetime
 import uuid
 import logging
+import os
+import utils.dataset_loader as dataset_loader
+import file.api.service as file_service
 
 logger = logging.getLogger(__name__)
 
@@ -89,7 +92,7 @@ class FileUploadFindInaccurateDataView(APIView):
                 return Response({"error": "File not found in database."}, status=status.HTTP_404_NOT_FOUND)
 
             # File found, proceed with cleansing
-            result = data_cleansing(file["filename"])
+            result = data_cleansing(file["filename"], dialect=dataset_loader.dialect_from_record(file))
 
             if "error" in result:
                 return Response(
@@ -206,7 +209,7 @@ class ProcessCleaningFile(APIView):
                 cleansing_result = process_cleansing(file["filename"], [
                     "delete_missing_row",
                     "delete_duplicate_row"
-                ])
+                ], dialect=dataset_loader.dialect_from_record(file))
                 if "error" in cleansing_result:
                     response_data["cleansing_error"] = cleansing_result["error"]
                 else:
@@ -214,12 +217,15 @@ class ProcessCleaningFile(APIView):
                     cleansed_file_data = {
                         "project_id": project_id,
                         "filename": cleansing_result["filename"],
-                        "file": cleansing_result["filename"],
+                        "file": f"cleansed_{file.get('file') or file['filename']}",
+                        "content_hash": cleansing_result["content_hash"],
                         "size": cleansing_result["size"],
                         "type": "csv",
                         "is_original": False,
+                        "is_deleted": False,
                         "original_file": str(file.get("_id")),
-                        "created_at": datetime.utcnow()
+                        "created_at": datetime.utcnow(),
+                        **cleansing_result["dialect"],
                     }
                     # Insert cleansed file into MongoDB
                     inserted_id = db.files.insert_one(cleansed_file_data).inserted_id
@@ -234,11 +240,14 @@ class ProcessCleaningFile(APIView):
             try:
                 if "cleansing_error" not in response_data:
                     file_handler = FileHandler(server_path=file_server_path_file)
-                    cleansed_file_path = f"{cleansing_result['filename']}"  # Fix path here
+                    # FileHandler adds the csv/ directory itself
+                    cleansed_file_path = os.path.basename(cleansing_result['filename'])
                     data = file_handler.load_dataset(cleansed_file_path)
 
-                    # Extract metadata
-                    extractor = MetadataExtractor(df_iterator=data)
+                    # Extract metadata, the cleansed file keeps the columns and date formats of the original
+                    extractor = MetadataExtractor(
+                        df_iterator=data, date_formats=file_service.stored_date_formats(file["filename"])
+                    )
                     metadata = extractor.extract()
 
                     # Clean metadata
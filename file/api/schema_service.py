@@ -0,0 +1,75 @@
+import logging
+from django.conf import settings
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from datetime import datetime
+from metafile.api.services.data_cleaning import convert_numpy_types
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaService:
+    """
+    Inferred dataset schemas stored in Mongo, one document per file.
+
+    Each document records the file version (mtime and size) it was inferred from, so a
+    changed file never answers from a stale schema.
+    """
+
+    def __init__(self):
+        try:
+            self.client = MongoClient(settings.DATABASES['default']['CLIENT']['host'])
+            self.db = self.client[settings.DATABASES['default']['NAME']]
+        except Exception as e:
+            logger.error(f"Failed to initialize MongoDB client: {e}")
+            raise
+
+    def close_connection(self):
+        """
+        Close the MongoDB connection.
+        """
+        if self.client:
+            self.client.close()
+
+    def get_schema(self, filename, version):
+        """
+        Stored schema of filename, or None when missing or inferred from another version.
+        """
+        try:
+            document = self.db.schemas.find_one({"filename": filename, "version": version})
+            return document["schema"] if document else None
+        except PyMongoError as e:
+            logger.error(f"Error retrieving schema from MongoDB: {e}")
+            return None
+        finally:
+            self.close_connection()
+
+    def store_schema(self, filename, version, schema):
+        """
+        Store (or replace) the schema of filename for the given file version.
+        """
+        try:
+            self.db.schemas.replace_one(
+                {"filename": filename},
+                {
+                    "filename": filename,
+                    "version": version,
+                    "schema": convert_numpy_types(schema),
+                    "created_at": datetime.utcnow(),
+                },
+                upsert=True,
+            )
+            return True
+        except PyMongoError as e:
+            logger.error(f"Error storing schema in MongoDB: {e}")
+            return False
+        finally:
+            self.close_connection()
+
+    def invalidate(self, filename):
+        try:
+            self.db.schemas.delete_many({"filename": filename})
+        except PyMongoError as e:
+            logger.error(f"Error removing schema from MongoDB: {e}")
+        finally:
+            self.close_connection()
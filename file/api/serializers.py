@@ -7,6 +7,11 @@ from bson import ObjectId
 class FileResponeSerializer(serializers.ModelSerializer):
     project = serializers.CharField(write_only=True)  # Accept project ID as a string for validation
     project_id = serializers.SerializerMethodField(read_only=True)  # Return project ID as a string in response
+    # Keep whitespace, tab delimiters and line terminators are meaningful
+    delimiter = serializers.CharField(max_length=5, required=False, allow_null=True, trim_whitespace=False)
+    quotechar = serializers.CharField(max_length=5, required=False, allow_null=True, trim_whitespace=False)
+    line_terminator = serializers.CharField(max_length=5, required=False, allow_null=True, trim_whitespace=False)
+    schema = serializers.JSONField(required=False, allow_null=True)
 
     class Meta:
         model = File
@@ -6,205 +6,110 @@ import uuid
 from dotenv import load_dotenv
 import pandas as pd
 import numpy as np
-import chardet
 import utils.file_util as util
 from rest_framework import status
-import csv
 import subprocess
 import json
 import os
 import utils.file_util as file_utile
+import utils.dataset_loader as dataset_loader
+import utils.compression as compression
+import utils.type_inference as type_inference
+import utils.column_profile as column_profile
+import utils.date_detection as date_detection
+from file.models import File
+from file.api.schema_service import SchemaService
 from django.http import HttpResponse
-import re
 dotenv_path_dev = '.env'
 load_dotenv(dotenv_path=dotenv_path_dev)
 
 file_server_path_file = os.getenv("FILE_SERVER_PATH_FILE")
 file_base_url = os.getenv("BASE_URL_FILE")
 
-def get_delimiter(file_path, num_lines=5):
-    try:
-        with open(file_path, 'r', newline='') as file:
-            # Read a few lines from the text file for analysis
-            sample_lines = [file.readline() for _ in range(num_lines)]
-
-            # Use the Sniffer class to detect the delimiter
-            dialect = csv.Sniffer().sniff(''.join(sample_lines))
-
-            # The delimiter is stored in the 'delimiter' attribute of the dialect
-            return dialect.delimiter
-    except FileNotFoundError:
-        return None
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
-
 def get_file_extension(filename):
     _, extension = os.path.splitext(filename)
     return extension
 
 
-def detect_delimiter(file_path):
-    with open(file_path, 'r') as file:
-        sample = file.read(1024)  # Read a sample of the file
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
-
-
-def load_dataset(filename, size=0,file=None):
-
-    file_path = file_server_path_file+filename
-    type_file = get_file_extension(filename).replace('.', "").strip()
-    data = None
+def get_file_dialect(filename):
+    """
+    Dialect stored on the File record at ingest, used when only the filename is known.
+    """
+    file = File.objects.filter(filename=filename, is_deleted=False).first()
+    return file.get_dialect() if file else None
 
-    try:
 
-        with open(file_path, 'rb') as raw_data:
-            result = chardet.detect(raw_data.read(1000))
-        encoding = result['encoding']
+def stored_row_count(filename):
+    """
+    Row count counted by the ingest pipeline, or None for files stored without one.
+    """
+    file = File.objects.filter(filename=filename, is_deleted=False).exclude(row_count=None).first()
+    return file.row_count if file else None
 
-        if type_file == 'csv':
-            try:
-                data = pd.read_csv(file_path, encoding=encoding,
-                                   on_bad_lines="skip")
-            except UnicodeDecodeError:
-                data = pd.read_csv(file_path, encoding="latin1",
-                                   on_bad_lines="skip")
 
-        elif type_file == 'json':
+def to_records(data):
+    data = data.where(pd.notnull(data), None)
+    data = data.apply(lambda x: x.astype(str) if x.dtype == 'float' else x)
+    return data.to_dict(orient='records')
 
-            try:
-                data = pd.read_json(file_path, encoding=encoding)
 
-            except Exception as e:
-
-                print(e)
-        elif type_file == 'txt':
-
-            data = pd.read_csv(file_path, encoding=encoding,
-                               delimiter=detect_delimiter(file_path))
-        elif type_file == 'xlsx':
-
-            data = pd.read_excel(file_path)
+def load_dataset_rows(filename, dialect=None):
+    """
+    Lazy rows for pagination: only the requested page is parsed, using the row index.
+    Returns None when the file has no row index yet.
+    """
+    file_path = file_server_path_file+filename
+    return dataset_loader.load_rows(file_path, dialect=dialect, formatter=to_records)
 
-    except FileNotFoundError as e:
 
-        print(e)
+def load_dataset(filename, size=0,file=None, dialect=None):
 
-    if data is not None and not data.empty:
+    file_path = file_server_path_file+filename
 
-        data = data.where(pd.notnull(data), None)
-        data = data.apply(lambda x: x.astype(str) if x.dtype == 'float' else x)
-        if int(size) != 0:
+    if int(size) != 0:
+        # Preview: parse only the first rows, the total comes from a cheap row count
+        data = dataset_loader.read_preview(file_path, int(size), dialect=dialect)
+        if data is not None and not data.empty:
             return {
                 "file":file,
-                "total": len(data),
+                "total": dataset_loader.count_rows(file_path, dialect=dialect, row_count=stored_row_count(filename)),
                 "header": data.columns.to_list(),
-                "data": data.head(int(size)).to_dict(orient='records')
+                "data": to_records(data)
             }
-        size = len(data)
+        return None
+
+    data = dataset_loader.load_dataframe(file_path, dialect=dialect)
+
+    if data is not None and not data.empty:
+
         return {
             "file":file,
             "total": len(data),
             "header": data.columns.to_list(),
-            "data": data.head(int(size)).to_dict(orient='records')
+            "data": to_records(data)
         }
     return None
 
-def find_character(text):
-
-    regex_pattern = r'[A-Za-z]'
-    matches = re.findall(regex_pattern, text)
-
-    if matches: 
-        return True
-    return False
-
-def view_type_dataset(filename):
-
-    data = load_dataset(filename)
-    if data is not None:
-        numeric_columns = []
-        object_columns = []
-
-        for column in data.columns:
-            original_type = str(data[column].dtype)
-
-            if original_type == 'object':
-
-                numeric_values = data[column].astype(str).str.extract(r'(\d+)', expand=False)
-                if not numeric_values.dropna().empty:
+def view_type_dataset(filename, dialect=None):
 
-                    if find_character(str(data[column].head(1).iloc[0])):
-                        object_columns.append(column)
-                    else:    
-                        numeric_columns.append(column)
-                else:
-                    object_columns.append(column)
-            else:
-                numeric_columns.append(column)
+    schema = get_schema(filename, dialect=dialect)
+    if schema is not None:
+        return type_summary(schema)
 
-        return {
-            "count_header": len(data.columns),
-            "count_records": len(data),
-            "all_columns": data.columns.tolist(),
-            "numeric_columns": numeric_columns,
-            "object_columns": object_columns
-        }
-    
     return None
 
-def load_dataset_file(filename):
+def load_dataset_file(filename, dialect=None):
 
     file_path = file_server_path_file+filename
-    type_file = get_file_extension(filename).replace('.', "").strip()
-    data = None
-
-    try:
-
-        with open(file_path, 'rb') as raw_data:
-            result = chardet.detect(raw_data.read(1000))
-        encoding = result['encoding']
-
-        if type_file == 'csv':
-            try:
-                data = pd.read_csv(file_path, encoding=encoding,
-                                   on_bad_lines="skip")
-            except UnicodeDecodeError:
-                data = pd.read_csv(file_path, encoding="latin1",
-                                   on_bad_lines="skip")
-
-        elif type_file == 'json':
-
-            try:
-                data = pd.read_json(file_path, encoding=encoding)
-
-            except Exception as e:
-
-                print(e)
-        elif type_file == 'txt':
-
-            data = pd.read_csv(file_path, encoding=encoding,
-                               delimiter=detect_delimiter(file_path))
-        elif type_file == 'xlsx':
-
-            data = pd.read_excel(file_path)
-
-    except FileNotFoundError as e:
-
-        print(e)
+    data = dataset_loader.load_dataframe(file_path, dialect=dialect)
 
     if data is not None and not data.empty:
 
-        data = data.where(pd.notnull(data), None)
-        data = data.apply(lambda x: x.astype(str) if x.dtype == 'float' else x)
-        for col in data.columns:
-            data.rename(columns={col: str(col).strip()}, inplace=True)
-
+        # Native dtypes are kept; only numeric-looking text columns are parsed
+        data = dataset_loader.strip_column_names(data)
         numeric_columns = view_type_load_dataset(data)["numeric_columns"]
-        for col in numeric_columns:
-            data[col]= pd.to_numeric(data[col].replace('[^0-9.]', '', regex=True), errors='coerce')
-        return data
+        data = dataset_loader.coerce_numeric_columns(data, numeric_columns)
+        return dataset_loader.nulls_to_none(data)
 
     return None
 
@@ -212,90 +117,105 @@ def load_dataset_file(filename):
 def view_type_load_dataset(data):
 
     if data is not None:
-        numeric_columns = []
-        object_columns = []
+        return type_inference.column_summary(data)
 
-        for column in data.columns:
-            original_type = str(data[column].dtype)
+    return None
 
-            if original_type == 'object':
 
-                numeric_values = data[column].astype(str).str.extract(r'(\d+)', expand=False)
-                if not numeric_values.dropna().empty:
 
-                    if find_character(str(data[column].head(1).iloc[0])):
-                        object_columns.append(column)
-                    else:    
-                        numeric_columns.append(column)
-                else:
-                    object_columns.append(column)
-            else:
-                numeric_columns.append(column)
+def build_schema(filename, dialect=None):
+    """
+    Infer the schema of a dataset: column types, the lists the header and type views return
+    and the column profile of the details page.
+    """
+    raw = dataset_loader.load_dataframe(file_server_path_file + filename, dialect=dialect)
+    if raw is None or raw.empty:
+        return None
+    # Profiled as stored, before numeric coercion turns unparsable values into nulls
+    column_analysis = column_profile.profile_columns(raw)
 
-        return {
-            "count_header": len(data.columns),
-            "count_records": len(data),
-            "all_columns": data.columns.tolist(),
-            "numeric_columns": numeric_columns,
-            "object_columns": object_columns
-        }
-    
-    return None
+    data = load_dataset_file(filename, dialect=dialect)
+    if data is None:
+        return None
+
+    inferred = type_inference.infer_schema(data)
+    numeric_columns = [column["name"] for column in inferred["columns"] if column["type"] == type_inference.NUMERIC]
+    object_columns = [column["name"] for column in inferred["columns"] if column["type"] != type_inference.NUMERIC]
+
+    # Detected once per file version; later parses read the stored format (stored_date_formats)
+    date_formats = []
+    for col in data.columns:
+        date_format = date_detection.detect_date_format(data[col])
+        if date_format is not None:
+            date_formats.append({"name": col, "format": date_format})
+    date_columns = [column["name"] for column in date_formats]
+
+    return {
+        "columns": [
+            {"name": column["name"], "type": column["type"], "confidence": column["confidence"]}
+            for column in inferred["columns"]
+        ],
+        "count_header": len(data.columns),
+        "count_records": len(data),
+        "header": data.columns.tolist(),
+        "header_label": [{"value": col, "label": col} for col in numeric_columns],
+        "numeric_columns": numeric_columns,
+        "object_columns": object_columns,
+        "date_columns": date_columns,
+        "date_formats": date_formats,
+        "column_analysis": column_analysis,
+    }
+
+
+def get_schema(filename, dialect=None):
+    """
+    Schema of the current file version, inferred once and then served from Mongo.
+    """
+    version = dataset_loader.file_version(file_server_path_file + filename)
+    if version is None:
+        return None
+    schema = SchemaService().get_schema(filename, version)
+    # Schemas stored before the column profile and date formats existed are rebuilt once
+    if schema is None or "date_formats" not in schema:
+        schema = build_schema(filename, dialect=dialect)
+        if schema is not None:
+            SchemaService().store_schema(filename, version, schema)
+    return schema
+
+
+def stored_date_formats(filename):
+    """
+    {column: format} of the date columns in the stored schema of the current file version.
+    Empty when no schema was stored yet, it is not inferred here.
+    """
+    version = dataset_loader.file_version(file_server_path_file + filename)
+    schema = SchemaService().get_schema(filename, version) if version is not None else None
+    return {column["name"]: column["format"] for column in (schema or {}).get("date_formats", [])}
 
 
+def type_summary(schema):
+    return {
+        "count_header": schema["count_header"],
+        "count_records": schema["count_records"],
+        "all_columns": schema["header"],
+        "numeric_columns": schema["numeric_columns"],
+        "object_columns": schema["object_columns"],
+    }
 
-def load_datasetHeader(filename):
+
+def load_datasetHeader(filename, dialect=None):
 
     try:
-        data = load_dataset_file(filename)
-        if data is not None:
-            numeric_columns = []
-            object_columns = []
-            for column in data.columns:
-                original_type = str(data[column].dtype)
-
-                if original_type == 'object':
-
-                    numeric_values = data[column].astype(str).str.extract(r'(\d+)', expand=False)
-                    if not numeric_values.dropna().empty:
-
-                        if find_character(str(data[column].head(1).iloc[0])):
-                            object_columns.append(column)
-                        else:    
-                            numeric_columns.append(column)
-                    else:
-                        object_columns.append(column)
-                else:
-                    numeric_columns.append(column)
-
-            date_columns = []
-            for col in data.columns:
-                # Check if the column contains string-like data
-                if data[col].dtype == 'object' or any(isinstance(x, str) for x in data[col]):
-                    try:
-                        # Attempt to convert the column to datetime
-                        pd.to_datetime(data[col])
-                        # If successful, add to the list
-                        date_columns.append(col)
-                        print(col)
-                    except (ValueError, TypeError, pd.errors.OutOfBoundsDatetime):
-                        # If conversion fails, it's not a date column
-                        continue
-            msg = []
-            for col in numeric_columns:
-                respone ={
-                    "value":col,
-                    "label":col
-                }
-                msg.append(respone)
+        schema = get_schema(filename, dialect=dialect)
+        if schema is not None:
             return {
-                "count_header": len(data.columns),
-                "count_records": len(data),
-                "header_label":msg,
-                "header": data.columns.tolist(),
-                "header_numeric": numeric_columns,
-                "object_columns": object_columns,
-                "header_date": date_columns,  
+                "count_header": schema["count_header"],
+                "count_records": schema["count_records"],
+                "header_label": schema["header_label"],
+                "header": schema["header"],
+                "header_numeric": schema["numeric_columns"],
+                "object_columns": schema["object_columns"],
+                "header_date": schema["date_columns"],
             }
         
     except Exception as e :
@@ -308,6 +228,8 @@ def remove_file(filename):
     if file_utile.find_file_by_filename(filename):  # Ensure this function returns a valid result
         try:
             os.remove(path_file)  # File removal may raise an exception if the file is locked or missing
+            dataset_loader.remove_derived(path_file)
+            SchemaService().invalidate(filename)
             return True
         except OSError as e:
             print(f"Error removing file: {e}")
@@ -315,14 +237,31 @@ def remove_file(filename):
     return False
 
 
-def download_file(filename):
+def release_file(file):
+    """
+    Reference-counted removal: identical uploads share one stored blob, which is only
+    deleted from disk when the last File referencing it goes away. The filename is the
+    path under the file server (cleansed files keep their csv/ directory), so records
+    only share a blob when they point to the same stored file.
+    """
+    # Cleansed records inserted before is_deleted was written have no such field
+    shared = File.objects.filter(
+        filename=file.filename, is_deleted__in=[False, None]
+    ).exclude(_id=file._id).exists()
+    if shared:
+        return True
+    return remove_file(file.filename)
+
+
+def download_file(filename, download_name=None):
     file_path = file_server_path_file + filename
     if file_utile.find_file_by_filename(filename):
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'rb') as file:
+                # Stored datasets may be compressed, the download is the original content
+                with compression.open_stream(file_path) as file:
                     response = HttpResponse(file.read(), content_type='application/octet-stream')
-                    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                    response['Content-Disposition'] = f'attachment; filename="{download_name or filename}"'
                     return response
             except Exception as e:
                 # Log or handle error if file read fails
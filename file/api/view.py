@@ -1,5 +1,4 @@
 import os
-import re
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.views import APIView
@@ -9,12 +8,21 @@ from file.models import File
 from file.api.serializers import FileResponeSerializer, UpdateFileSerializer, FileQuerySerializer
 from project.models import Project
 import file.api.service as service
+import utils.dataset_loader as dataset_loader
 from pagination.pagination import Pagination
 from bson import ObjectId
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 import logging
 from metafile.api.services.metadata_extractor import MetadataExtractor
+from metafile.api.services.data_cleaning import replace_nan_with_none
+from metafile.api.service import MetadataService
+from utils.ingest import IngestPipeline
+import utils.blob_store as blob_store
+from file.api.schema_service import SchemaService
+import utils.row_index as row_index
+import utils.compression as compression
+import utils.dataset_sidecar as dataset_sidecar
 import pandas as pd
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -80,14 +88,49 @@ class FileUploadView(APIView):
         if not os.path.exists(base_path):
             os.makedirs(base_path)  # Create the directory if it doesn't exist
 
-        # Save the file to disk
-        file_path = os.path.join(base_path, uploaded_file.name)
-        with open(file_path, 'wb') as destination:
+        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+
+        # Write under a temporary name; every chunk also goes through the ingest pipeline
+        # (hash, dialect, row count and index, schema, metadata, Parquet sidecar) so nothing is re-read later
+        tmp_path = blob_store.temp_path(base_path, file_extension)
+        extractor = MetadataExtractor()
+        pipeline = IngestPipeline(tmp_path, extractor=extractor, sidecar=True)
+        with open(tmp_path, 'wb') as destination:
             for chunk in uploaded_file.chunks():
                 destination.write(chunk)
+                pipeline.feed(chunk)
+
+        ingest = {"dialect": {}}
+        try:
+            ingest = pipeline.finish()
+        except Exception as e:
+            logger.warning(f"Ingest pipeline failed for {uploaded_file.name}: {e}")
+            pipeline.sidecar.abort()
+        dialect = ingest["dialect"]
+        content_hash = ingest.get("content_hash") or blob_store.hash_file(tmp_path)
+
+        # Identical content is stored once and shares its sidecar, row index and parsed cache
+        stored_name, created = blob_store.commit_blob(tmp_path, base_path, content_hash, file_extension)
+        file_path = os.path.join(base_path, stored_name)
+        if created:
+            dataset_loader.remove_derived(file_path)
+            SchemaService().invalidate(stored_name)
+            # Byte offsets only make sense in uncompressed blobs
+            if ingest.get("row_index") and not compression.detect_codec(file_path):
+                row_index.save_row_index(file_path, ingest["row_index"])
+            if file_extension.replace('.', '') in dataset_loader.SUPPORTED_TYPES:
+                # Columnar sidecar for later full reads, written from the pipeline's batches
+                # unless their column types did not line up
+                if ingest.get("sidecar"):
+                    dataset_sidecar.move_sidecar(tmp_path, file_path)
+                else:
+                    dataset_loader.build_sidecar(file_path, dialect=dialect)
+                # Group-by aggregates for the charts and KPIs, computed off the request
+                dataset_loader.build_cube_in_background(file_path, dialect=dialect)
+        # A sidecar written for content that was already stored is not needed
+        dataset_sidecar.remove_sidecar(tmp_path)
 
         # Determine file type based on the file extension
-        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
         file_type = None
         if file_extension == '.csv':
             file_type = 'csv'
@@ -104,11 +147,15 @@ class FileUploadView(APIView):
 
         # Prepare data for the serializer
         data = {
-            "filename": uploaded_file.name,
-            "file": os.path.basename(file_path),
+            "filename": stored_name,
+            "file": uploaded_file.name,
             "size": uploaded_file.size,
             "type": file_type,
             "project": project_id,
+            "content_hash": content_hash,
+            "row_count": ingest.get("row_count"),
+            "schema": ingest.get("schema"),
+            **dialect,
         }
 
         # Serialize the data
@@ -118,6 +165,22 @@ class FileUploadView(APIView):
 
             # Return the saved file, ensuring MongoDB _id is used instead of id
             response_data = FileResponeSerializer(saved_file).data
+
+            # Column metadata was gathered during the upload, store it with the file
+            metadata = None
+            if pipeline.extractor is not None:
+                try:
+                    metadata = replace_nan_with_none(extractor.finalize())
+                except Exception as e:
+                    logger.warning(f"Could not compile metadata for {file_path}: {e}")
+            if metadata:
+                metadata_id = MetadataService().store_metadata(
+                    file_id=response_data["_id"],
+                    project_id=project_id,
+                    metadata=metadata
+                )
+                response_data["metadata_id"] = metadata_id
+
             return Response({
                 "success": True,
                 "message": "File uploaded successfully.",
@@ -155,7 +218,7 @@ class ViewHeaderView(APIView):
     
     def get(self, request, *args, **kwargs):
         filename = kwargs["filename"]
-        result = service.load_datasetHeader(filename=filename)
+        result = service.load_datasetHeader(filename=filename, dialect=service.get_file_dialect(filename))
         return Response(result)
 
 
@@ -200,7 +263,7 @@ class DownloadFileAPIview(APIView):
             file = files.first()  # You can modify this logic if needed to select based on certain conditions
             
             # Proceed with file download logic
-            response = service.download_file(file.filename)
+            response = service.download_file(file.filename, download_name=file.file)
             if response:
                 return response
 
@@ -213,72 +276,6 @@ class FileDetailsViews(APIView):
     pagination_class = Pagination
     permission_classes = [permissions.AllowAny]
 
-    def analyze_columns(self, data):
-        """
-        Perform comprehensive column analysis
-        """
-        headers = data.get("header", [])
-        records = data.get("data", [])
-        
-        column_analysis = {}
-        for header in headers:
-            column_data = [str(row.get(header, '')) for row in records if header in row]
-            
-            column_analysis[header] = {
-                "name": header,
-                "total_values": len(column_data),
-                "unique_values": len(set(column_data)),
-                "unique_percentage": round(len(set(column_data)) / len(column_data) * 100, 2) if column_data else 0,
-                "data_types": self.detect_column_types(column_data),
-                "sample_values": column_data[:5],  # First 5 sample values
-                "is_nullable": any(not value for value in column_data)
-            }
-        
-        return column_analysis
-
-    def detect_column_types(self, column_data):
-        """
-        Detect potential data types for a column
-        """
-        data_types = {
-            "numeric": 0,
-            "string": 0,
-            "boolean": 0,
-            "date": 0
-        }
-        
-        for value in column_data:
-            try:
-                # Numeric check
-                float(value)
-                data_types["numeric"] += 1
-            except ValueError:
-                # Boolean check
-                if value.lower() in ['true', 'false', '0', '1']:
-                    data_types["boolean"] += 1
-                # Date check (basic)
-                elif self.is_date(value):
-                    data_types["date"] += 1
-                # String (default)
-                else:
-                    data_types["string"] += 1
-        
-        # Convert to percentages
-        total = len(column_data)
-        return {k: round(v/total * 100, 2) for k, v in data_types.items()}
-
-    def is_date(self, value):
-        """
-        Basic date detection
-        """
-        date_formats = [
-            r'^\d{4}-\d{2}-\d{2}$',  # YYYY-MM-DD
-            r'^\d{2}/\d{2}/\d{4}$',   # MM/DD/YYYY
-            r'^\d{2}-\d{2}-\d{4}$'    # DD-MM-YYYY
-        ]
-        
-        return any(re.match(pattern, str(value)) for pattern in date_formats)
-
     def get(self, request, *args, **kwargs):
         file_id = kwargs.get("file_id")
 
@@ -294,23 +291,20 @@ class FileDetailsViews(APIView):
 
         # Process the file data
         filename = file.filename
-        data = service.load_dataset(filename, file=file.file)
-
-        # Analyze columns
-        column_analysis = self.analyze_columns(data)
-
-        # Update response data with file details
-        data.update({
-            "_id": str(file._id),
-            "created_at": file.created_at,
-            "filename": file.filename,
-            "size": file.size,
-            "uuid": file.uuid,
-            "type": file.type,
-        })
-
-        # Paginate the records
-        records = data.get("data", [])
+        dialect = file.get_dialect()
+
+        # Column analysis is computed once per file version and served from the stored schema
+        schema = service.get_schema(filename, dialect=dialect)
+        if schema is None:
+            return Response({"message": "File not found or empty."}, status=status.HTTP_404_NOT_FOUND)
+        column_analysis = {column["name"]: column for column in schema["column_analysis"]}
+        headers = [column["name"] for column in schema["column_analysis"]]
+
+        # Paginate the records, parsing only the requested page when the file has a row index
+        records = service.load_dataset_rows(filename, dialect=dialect)
+        if records is None:
+            data = service.load_dataset(filename, file=file.file, dialect=dialect)
+            records = data.get("data", []) if data else []
         paginator = self.pagination_class()
         result_page = paginator.paginate_queryset(records, request)
 
@@ -319,14 +313,14 @@ class FileDetailsViews(APIView):
         paginated_response = paginator.get_paginated_response(result_page).data
         paginated_response.update({
             "_id": str(file._id),
-            "headers": list(data.get("header", [])),
-            "file": data.get("file", ""),
+            "headers": headers,
+            "file": file.file,
             "filename": filename,
-            "total_row": data.get("total", None),
+            "total_row": file.row_count if file.row_count is not None else schema["count_records"],
             "column_analysis": column_analysis,
             "dataset_summary": {
                 "total_rows": len(records),
-                "total_columns": len(data.get("header", [])),
+                "total_columns": len(headers),
                 "file_type": file.type,
                 "file_size": file.size
             }
@@ -382,9 +376,9 @@ class DeleteFileView(APIView):
             if file.is_sample:
                 return Response({"error": "Cannot delete a sample file."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Proceed with file removal from storage
-            if service.remove_file(file.filename):
-                logger.info(f"File {file.filename} removed from storage.")
+            # Proceed with file removal from storage, the blob is kept while other files share it
+            if service.release_file(file):
+                logger.info(f"File {file.filename} released from storage.")
                 # Mark the file as deleted in the database (actually delete it)
                 self._mark_file_as_deleted(file)
                 return Response({"message": "File deleted successfully."}, status=status.HTTP_200_OK)
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='encoding',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='delimiter',
+            field=models.CharField(blank=True, max_length=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='quotechar',
+            field=models.CharField(blank=True, max_length=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='header_row',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='line_terminator',
+            field=models.CharField(blank=True, max_length=5, null=True),
+        ),
+    ]
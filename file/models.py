@@ -3,6 +3,7 @@ from project.models import Project
 from django.db import models
 from bson import ObjectId
 import uuid
+from utils.dataset_loader import DIALECT_FIELDS
 
 class File(models.Model):
     _id = djongo_models.ObjectIdField(primary_key=True, default=ObjectId)
@@ -17,6 +18,18 @@ class File(models.Model):
     is_deleted = models.BooleanField(default=False)
     is_sample = models.BooleanField(default=False)
 
+    # Dialect detected once at ingest and reused by every read
+    encoding = models.CharField(max_length=50, null=True, blank=True)
+    delimiter = models.CharField(max_length=5, null=True, blank=True)
+    quotechar = models.CharField(max_length=5, null=True, blank=True)
+    header_row = models.IntegerField(null=True, blank=True)
+    line_terminator = models.CharField(max_length=5, null=True, blank=True)
+
+    # Filled by the streaming ingest pipeline while the upload is written
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    row_count = models.IntegerField(null=True, blank=True)
+    schema = djongo_models.JSONField(null=True, blank=True)
+
     original_file = models.ForeignKey(
         "self",
         null=True,
@@ -25,6 +38,12 @@ class File(models.Model):
         related_name="cleansed_files",
     )
 
+    def get_dialect(self):
+        """Stored dialect for the dataset loader, or None if it was never detected."""
+        if not self.encoding:
+            return None
+        return {field: getattr(self, field) for field in DIALECT_FIELDS}
+
     class Meta:
         verbose_name = "file"
         verbose_name_plural = "files"
@@ -1,3 +1,127 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from django.test import SimpleTestCase
 
-# Create your tests here.
+import pandas as pd
+
+import utils.dataset_loader as dataset_loader
+import utils.dataset_sidecar as dataset_sidecar
+import utils.numeric_parser as numeric_parser
+from utils.ingest import IngestPipeline
+
+
+class DatasetFileTestCase(SimpleTestCase):
+    """
+    Writes dataset files into a temporary directory removed after each test.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+
+class DialectTest(SimpleTestCase):
+
+    def header_row(self, content):
+        return dataset_loader.dialect_from_sample(content.encode("utf-8"), "csv")["header_row"]
+
+    def test_sparse_rows_keep_the_wider_header(self):
+        content = "id,name,city,phone,email\n" + "".join(f"{i},n{i},c{i}\n" for i in range(20))
+        self.assertEqual(self.header_row(content), 0)
+
+    def test_title_lines_above_the_table_are_skipped(self):
+        content = "Sales report\nExported 2024-01-01\n" + "id,name,amount\n" + "".join(f"{i},n{i},{i}\n" for i in range(20))
+        self.assertEqual(self.header_row(content), 2)
+
+
+class IterJsonTest(DatasetFileTestCase):
+
+    def test_json_lines_with_nested_objects_keep_every_line(self):
+        path = self.write("nested.json", (
+            '{"user": {"id": 1, "name": "a"}, "meta": {"source": "x"}}\n'
+            '{"user": {"id": 2, "name": "b"}, "meta": {"source": "y"}}\n'
+            '{"user": {"id": 3, "name": "c"}, "meta": {"source": "z"}}\n'
+        ))
+        data = pd.concat(dataset_loader.iter_json(path, chunksize=2), ignore_index=True)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data["user.id"].tolist(), [1, 2, 3])
+        self.assertEqual(data["meta.source"].tolist(), ["x", "y", "z"])
+
+    def test_single_column_oriented_document(self):
+        path = os.path.join(self.directory, "columns.json")
+        pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_json(path)
+        data = pd.concat(dataset_loader.iter_json(path), ignore_index=True)
+
+        self.assertEqual(data.to_dict(orient="list"), {"a": [1, 2], "b": [3, 4]})
+
+
+class SidecarWriterTest(DatasetFileTestCase):
+
+    def test_key_first_seen_in_a_later_chunk_drops_the_streamed_sidecar(self):
+        records = [{"id": i} for i in range(1200)] + [{"id": i, "extra": "x"} for i in range(1200, 1500)]
+        path = os.path.join(self.directory, "late_key.json")
+        pd.DataFrame.from_records(records).to_json(path, orient="records")
+
+        pipeline = IngestPipeline(path, sidecar=True)
+        with open(path, "rb") as file:
+            pipeline.feed(file.read())
+        result = pipeline.finish()
+
+        self.assertFalse(result["sidecar"])
+        self.assertFalse(os.path.exists(dataset_sidecar.sidecar_path(path)))
+        # The rebuild from the source file keeps the late column
+        self.assertTrue(dataset_loader.build_sidecar(path))
+        self.assertIn("extra", dataset_sidecar.read_sidecar(path).columns)
+
+    def test_integer_column_with_nulls_in_a_later_chunk(self):
+        path = os.path.join(self.directory, "ints.csv")
+        writer = dataset_sidecar.SidecarWriter(path)
+        writer.write(pd.DataFrame({"a": [1, 2]}))
+        writer.write(pd.DataFrame({"a": [3.0, None]}))
+
+        self.assertTrue(writer.close(rows=4))
+        self.assertEqual(dataset_sidecar.read_sidecar(path)["a"].tolist()[:3], [1, 2, 3])
+
+
+class NumberFormatTest(SimpleTestCase):
+
+    def assertParsed(self, values, expected, decimal, thousands):
+        series = pd.Series(values)
+        number_format = numeric_parser.detect_number_format(series)
+        self.assertEqual((number_format["decimal"], number_format["thousands"]), (decimal, thousands))
+        self.assertEqual(numeric_parser.parse_numbers(series).tolist(), expected)
+
+    def test_space_grouped_with_decimal_comma(self):
+        self.assertParsed(["1 234,5", "12 345,75", "7,25"], [1234.5, 12345.75, 7.25], ",", " ")
+
+    def test_no_break_and_narrow_space_groups(self):
+        self.assertParsed(["1\u00a0234,5", "2\u202f000,25"], [1234.5, 2000.25], ",", " ")
+
+    def test_space_grouped_integers(self):
+        self.assertParsed(["1 234 567", "2 000"], [1234567, 2000], ".", " ")
+
+    def test_apostrophe_grouped(self):
+        self.assertParsed(["1'234.50", "12'345.00", "-3.5"], [1234.5, 12345.0, -3.5], ".", "'")
+
+    def test_decimal_comma(self):
+        self.assertParsed(["3,5", "12,50", "-0,75"], [3.5, 12.5, -0.75], ",", ".")
+
+    def test_dot_grouped_with_currency(self):
+        self.assertParsed(["€1.234,56", "€ 2.000,00"], [1234.56, 2000.0], ",", ".")
+
+    def test_comma_grouped(self):
+        self.assertParsed(["1,234.5", "2,000"], [1234.5, 2000.0], ".", ",")
+
+    def test_percent_and_parentheses(self):
+        self.assertEqual(numeric_parser.parse_numbers(pd.Series(["12%", "3.5%"])).tolist(), [12.0, 3.5])
+        self.assertEqual(numeric_parser.parse_numbers(pd.Series(["(1,200)", "300"])).tolist(), [-1200, 300])
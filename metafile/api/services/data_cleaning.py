@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 
 
 def replace_nan_with_none(obj):
@@ -28,35 +27,3 @@ def convert_numpy_types(obj):
     elif isinstance(obj, list):
         return [convert_numpy_types(item) for item in obj]
     return obj
-
-
-def is_date_column(series):
-    try:
-        pd.to_datetime(series.dropna().sample(n=min(100, len(series))))
-        return True
-    except (ValueError, TypeError):
-        return False
-
-
-def is_date_column(series):
-    try:
-        date_formats = [
-            '%Y-%m-%d', 
-            '%m/%d/%Y', 
-            '%d-%m-%Y', 
-            '%Y/%m/%d',
-            '%d/%m/%Y'
-        ]
-        
-        for fmt in date_formats:
-            try:
-                pd.to_datetime(series.dropna(), format=fmt)
-                return True
-            except:
-                continue
-        
-        # If no specific format works, try flexible parsing
-        pd.to_datetime(series.dropna(), infer_datetime_format=True, errors='raise')
-        return True
-    except:
-        return False
\ No newline at end of file
@@ -1,5 +1,5 @@
-import pandas as pd
 import utils.file_utils as file_utils
+import utils.dataset_loader as dataset_loader
 from rest_framework.exceptions import ValidationError
 import logging
 logger = logging.getLogger(__name__)
@@ -12,16 +12,6 @@ class FileHandler:
     def __init__(self, server_path):
         self.server_path = server_path
 
-    @staticmethod
-    def detect_separator(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                sample = f.read(1024)
-                return ';' if sample.count(';') > sample.count(',') else ','
-        except Exception as e:
-            print(f"Error detecting separator: {e}")
-            return ','  # Default to comma if detection fails
-
     def upload_file_to_server(self, file):
         try:
             file_extension = file_utils.get_file_extension(str(file))
@@ -38,22 +28,15 @@ class FileHandler:
             raise
 
 
-    def load_dataset(self, file_name, chunksize=1000):
+    def load_dataset(self, file_name, chunksize=dataset_loader.DEFAULT_CHUNKSIZE):
         extension = file_utils.get_file_extension(file_name)
         file_path = f"{self.server_path}/{extension}/{file_name}"
 
         try:
-            if extension == 'csv':
-                sep = self.detect_separator(file_path)
-                reader = pd.read_csv(file_path, chunksize=chunksize, iterator=True, sep=sep, na_values=['', 'NULL'], keep_default_na=False)
-            elif extension == 'json':
-                reader = pd.read_json(file_path, lines=True, chunksize=chunksize)
-            elif extension in ['xls', 'xlsx']:
-                reader = pd.read_excel(file_path, chunksize=chunksize, iterator=True)
-            else:
+            if extension not in dataset_loader.SUPPORTED_TYPES:
                 raise ValueError("Unsupported file format")
-            
-            return reader
+
+            return dataset_loader.iter_dataset(file_path, chunksize=chunksize)
         except Exception as e:
             print(f"Error loading dataset: {e}")
-            raise e
\ No newline at end of file
+            raise e
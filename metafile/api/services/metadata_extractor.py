@@ -3,12 +3,12 @@ import numpy as np
 import uuid
 from collections import Counter
 
-from metafile.api.services import data_cleaning
+import utils.date_detection as date_detection
 
 
 class MetadataExtractor:
 
-  def __init__(self, df_iterator):
+  def __init__(self, df_iterator=None, date_formats=None):
     self.df_iterator = df_iterator
     self.columns = None
     self.data_types = {}
@@ -20,19 +20,32 @@ class MetadataExtractor:
     self.numeric_stats = {}
     self.string_stats = {}
     self.datetime_stats = {}
+    # Formats already known for the file (stored schema), detected from the first chunk otherwise
+    self.date_formats = dict(date_formats or {})
     self.histograms = {}
     self.metadata = []
 
 
   def extract(self):
     for df in self.df_iterator:
-      if self.columns is None:
-        # Initialize structures based on the first chunk
-        self.initialize_columns(df=df)
-      # Update counts and statistics
-      self.update_statistics(df)
+      self.feed(df)
+    return self.finalize()
+
+
+  def feed(self, df):
+    # Incremental entry point: chunks can be pushed as they arrive, e.g. during an upload
+    if self.columns is None:
+      # Initialize structures based on the first chunk
+      self.initialize_columns(df=df)
+    # Update counts and statistics
+    self.update_statistics(df)
+
+
+  def finalize(self):
     # Compile metadata for all columns
-    self.compile_metadata()
+    self.metadata = []
+    if self.columns is not None:
+      self.compile_metadata()
     return self.metadata
 
 
@@ -64,9 +77,7 @@ class MetadataExtractor:
             'all_data': []  # For quantile calculation
         }
         self.histograms[col] = Counter()
-      elif data_cleaning.is_date_column(series=df[col]):
-        # Convert to datetime
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+      elif self.detect_date_format(col, df[col]):
         self.datetime_stats[col] = {
           'min': None,
           'max': None,
@@ -78,6 +89,13 @@ class MetadataExtractor:
         self.string_stats[col] = Counter()
 
 
+  def detect_date_format(self, col, series):
+    # The format detected on the first chunk is reused for every later chunk
+    if self.date_formats.get(col) is None:
+      self.date_formats[col] = date_detection.detect_date_format(series)
+    return self.date_formats[col] is not None
+
+
   def update_statistics(self, df):
     for col in self.columns:
       col_data = df[col]
@@ -172,7 +190,7 @@ class MetadataExtractor:
 
    
   def process_datetime_column(self, col, col_data):
-    col_data = pd.to_datetime(col_data, errors='coerce')
+    col_data = date_detection.parse_dates(col_data, self.date_formats[col])
     finite_data = col_data.dropna()
     if not finite_data.empty:
         stats = self.datetime_stats[col]
@@ -6,10 +6,11 @@ import os
 from dotenv import load_dotenv
 from file.models import File
 from django.forms.models import model_to_dict
-import csv
-import chardet
 from bson import ObjectId
 from project.models import Project
+import utils.dataset_loader as dataset_loader
+import utils.compression as compression
+from file.api.schema_service import SchemaService
 
 # Load environment variables
 dotenv_path_dev = '.env'
@@ -24,34 +25,12 @@ def get_file_extension(filename):
     _, extension = os.path.splitext(filename)
     return extension
 
-def get_delimiter(file_path, num_lines=5):
-    try:
-        with open(file_path, 'r', newline='') as file:
-            # Read a few lines from the text file for analysis
-            sample_lines = [file.readline() for _ in range(num_lines)]
-
-            # Use the Sniffer class to detect the delimiter
-            dialect = csv.Sniffer().sniff(''.join(sample_lines))
-
-            # The delimiter is stored in the 'delimiter' attribute of the dialect
-            return dialect.delimiter
-    except FileNotFoundError:
-        return None
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
-
-def detect_delimiter(file_path):
-    with open(file_path, 'r') as file:
-        sample = file.read(1024)  # Read a sample of the file
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
-
 def remove_file(filename):
     path_file = file_server_path_file+filename
     print(F"File path in remove file {path_file}")
     if find_file_by_filename(filename):
         os.remove(path_file)
+        dataset_loader.remove_derived(path_file)
         return True
     return False
 
@@ -110,7 +89,8 @@ def scrape_to_csv(url):
             filename = str(uuid.uuid4().hex) + ".csv"
 
             df.to_csv(os.path.join(
-                file_server_path_file, filename), header=False)
+                file_server_path_file, filename), header=False,
+                compression=compression.write_options(".csv"))
             table_names.append(filename)
 
     return {
@@ -121,6 +101,8 @@ def remove_file_server(filename):
     path_file = os.path.join(file_server_path_file, filename)
     if os.path.isfile(path_file):  # Use os.path.isfile to ensure it's a file
         os.remove(path_file)
+        dataset_loader.remove_derived(path_file)
+        SchemaService().invalidate(filename)
         return True
     else:
         print(f"File not found: {path_file}")
@@ -216,26 +198,30 @@ def remove_file(list_of_files):
     return message_response
 
 
-def load_dataset(filename, size=0):
+def load_dataset_rows(filename, dialect=None):
+    """
+    Lazy rows that parse only the requested page, or None without a row index.
+    """
     file_path = os.path.join(file_server_path_file, filename)
-    type_file = get_file_extension(filename).replace('.', "").strip()
-    data = None
+    return dataset_loader.load_rows(file_path, dialect=dialect)
+
+
+def load_dataset(filename, size=0, dialect=None):
+    file_path = os.path.join(file_server_path_file, filename)
+
+    if size > 0:
+        # Preview: parse only the first rows, the total comes from a cheap row count
+        data = dataset_loader.read_preview(file_path, size, dialect=dialect)
+        if data is None or data.empty:
+            return None
+        return {
+            "total": dataset_loader.count_rows(file_path, dialect=dialect),
+            "header": data.columns.tolist(),
+            "data": data.where(pd.notnull(data), None).to_dict(orient="records"),
+        }
 
     try:
-        # Detect encoding for reading the file
-        with open(file_path, 'rb') as raw_data:
-            result = chardet.detect(raw_data.read(1000))
-        encoding = result['encoding']
-
-        # Read the file based on type
-        if type_file == 'csv':
-            data = pd.read_csv(file_path, encoding=encoding, on_bad_lines="skip")
-        elif type_file == 'json':
-            data = pd.read_json(file_path, encoding=encoding)
-        elif type_file == 'txt':
-            data = pd.read_csv(file_path, encoding=encoding, delimiter=detect_delimiter(file_path))
-        elif type_file == 'xlsx':
-            data = pd.read_excel(file_path)
+        data = dataset_loader.load_dataframe(file_path, dialect=dialect)
     except Exception as e:
         print(f"Error loading dataset: {e}")
         return None
@@ -243,12 +229,6 @@ def load_dataset(filename, size=0):
     # Process data if successfully loaded
     if data is not None and not data.empty:
         data = data.where(pd.notnull(data), None)
-        if size > 0:
-            return {
-                "total": len(data),
-                "header": data.columns.tolist(),
-                "data": data.head(size).to_dict(orient="records"),
-            }
         return {
             "total": len(data),
             "header": data.columns.tolist(),
@@ -16,11 +16,12 @@ import file.api.service as service
 import json
 from django.http import JsonResponse
 from django.forms.models import model_to_dict
-from scrape.api.service import scrape_to_csv, save_file, remove_file, load_dataset
+from scrape.api.service import scrape_to_csv, save_file, remove_file, load_dataset, load_dataset_rows
 from scrape.api.serializers import ScrapeDataByUrlSerializer, ConfirmDataSetSerializer
 from django.http import Http404
 from pagination.pagination import Pagination
 from bson import ObjectId
+import utils.dataset_loader as dataset_loader
 
 class ScraperDataByUrlView(APIView):
     def post(self, request, *args, **kwargs):
@@ -72,6 +73,9 @@ class ConfirmDataSetView(APIView):
                         "error": f"File '{filename}' does not exist on the server."
                     }, status=status.HTTP_404_NOT_FOUND)
 
+                # Detect the dialect once, it is stored on the File record
+                dialect = dataset_loader.detect_dialect(file_path)
+
                 # Determine file type
                 file_extension = os.path.splitext(filename)[1].lower()
                 file_type = {
@@ -90,12 +94,14 @@ class ConfirmDataSetView(APIView):
                     "size": os.path.getsize(file_path),
                     "type": file_type,
                     "project": project_id,
+                    **dialect,
                 }
 
                 # Serialize and save file to database
                 file_serializer = FileResponeSerializer(data=data)
                 if file_serializer.is_valid():
                     saved_file = file_serializer.save()
+                    dataset_loader.prepare_dataset(file_path, dialect=dialect)
                     saved_files.append(FileResponeSerializer(saved_file).data)
                 else:
                     return Response(file_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -106,6 +112,7 @@ class ConfirmDataSetView(APIView):
                 file_path = os.path.join(base_path, filename)
                 if os.path.exists(file_path):
                     os.remove(file_path)
+                    dataset_loader.remove_derived(file_path)
 
             # Respond with the result
             return Response({
@@ -124,7 +131,18 @@ class ViewDataSetByFilenameView(APIView):
 
     def get(self, request, *args, **kwargs):
         # Load dataset based on the filename parameter
-        data = load_dataset(filename=kwargs.get('filename'))
+        filename = kwargs.get('filename')
+        dialect = service.get_file_dialect(filename)
+
+        # Seek straight to the requested page when the file has a row index
+        records = load_dataset_rows(filename, dialect=dialect)
+        if records is not None:
+            data = {
+                "total": records.count(),
+                "header": records.index["columns"],
+            }
+        else:
+            data = load_dataset(filename=filename, dialect=dialect)
         
         # Check if data is None, meaning file loading might have failed
         if data is None:
@@ -134,7 +152,8 @@ class ViewDataSetByFilenameView(APIView):
             )
 
         # Safely access "data" key, defaulting to an empty list if not present
-        records = data.get("data", [])
+        if records is None:
+            records = data.get("data", [])
         
         paginator = self.pagination_class()
         result_page = paginator.paginate_queryset(records, request)
@@ -144,6 +163,6 @@ class ViewDataSetByFilenameView(APIView):
         paginated_response["headers"] = list(data.get("header", []))
         paginated_response["file"] = data.get("file", "")
         paginated_response["total"] = data.get("total", None)
-        paginated_response["filename"] = kwargs.get('filename')
+        paginated_response["filename"] = filename
 
         return Response(paginated_response)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from functools import lru_cache
+import pandas as pd
+from dotenv import load_dotenv
+import utils.type_inference as type_inference
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+# A cube is a directory next to the file: totals.json and one JSON file per category column
+CUBE_SUFFIX = ".cube"
+TOTALS_NAME = "totals.json"
+# Only columns with at most this many distinct values are used as categories
+CUBE_MAX_CATEGORIES = int(os.getenv("CUBE_MAX_CATEGORIES", default="50"))
+# At most this many category columns per file, text columns and the fewest distinct values first
+CUBE_MAX_CATEGORY_COLUMNS = int(os.getenv("CUBE_MAX_CATEGORY_COLUMNS", default="20"))
+# Rows checked before counting the distinct values of a whole column
+CATEGORY_PROBE_ROWS = 10000
+# Cube files kept parsed in memory, per file version
+CUBE_CACHE_ENTRIES = int(os.getenv("CUBE_CACHE_ENTRIES", default="256"))
+AGGREGATIONS = ["sum", "count", "min", "max", "mean"]
+
+
+def cube_path(file_path):
+    return str(file_path) + CUBE_SUFFIX
+
+
+def group_name(category):
+    """
+    File name of a category's groups, column names may hold any character.
+    """
+    return "group-" + hashlib.sha1(str(category).encode("utf-8")).hexdigest()[:16] + ".json"
+
+
+def _values(series):
+    # NaN is not valid JSON, empty groups are stored as null
+    return [None if pd.isna(value) else value for value in pd.Series(series).tolist()]
+
+
+def _with_mean(stats):
+    return stats.assign(mean=stats["sum"] / stats["count"].where(stats["count"] > 0))
+
+
+def category_columns(data, max_categories=CUBE_MAX_CATEGORIES, max_columns=CUBE_MAX_CATEGORY_COLUMNS):
+    candidates = []
+    for category in data.columns:
+        # Most high-cardinality columns already show it in their first rows
+        if data[category].head(CATEGORY_PROBE_ROWS).nunique() > max_categories:
+            continue
+        distinct = data[category].nunique()
+        if 0 < distinct <= max_categories:
+            candidates.append((pd.api.types.is_numeric_dtype(data[category].dtype), distinct, category))
+    return [category for _, _, category in sorted(candidates, key=lambda item: item[:2])[:max_columns]]
+
+
+def build_cube(data, numeric_columns, max_categories=CUBE_MAX_CATEGORIES, max_columns=CUBE_MAX_CATEGORY_COLUMNS):
+    """
+    Sum, count, min, max and mean of every numeric column, in total and per value of the
+    low-cardinality columns. Returns (totals, {category: groups}).
+    """
+    start = time.perf_counter()
+    numeric_columns = [col for col in numeric_columns if pd.api.types.is_numeric_dtype(data[col].dtype)]
+    totals, groups = {}, {}
+    if not numeric_columns:
+        return totals, groups
+
+    stats = _with_mean(data[numeric_columns].agg(["sum", "count", "min", "max"]).T)
+    for col in numeric_columns:
+        totals[str(col)] = dict(zip(AGGREGATIONS, _values(stats.loc[col, AGGREGATIONS])))
+        totals[str(col)]["count"] = int(stats.at[col, "count"])
+
+    for category in category_columns(data, max_categories, max_columns):
+        try:
+            grouped = data.groupby(category, observed=True)[numeric_columns]
+            # One reduction per aggregation is faster than agg() with a list
+            stats = {"sum": grouped.sum(), "count": grouped.count(), "min": grouped.min(), "max": grouped.max()}
+        except TypeError as e:
+            # Mixed key types cannot be sorted
+            logger.debug(f"Skipping cube category {category}: {e}")
+            continue
+        measures = {}
+        for col in numeric_columns:
+            column_stats = _with_mean(pd.DataFrame({aggregation: frame[col] for aggregation, frame in stats.items()}))
+            measures[str(col)] = {aggregation: _values(column_stats[aggregation]) for aggregation in AGGREGATIONS}
+        groups[str(category)] = {"keys": _values(stats["sum"].index.to_series()), "measures": measures}
+
+    logger.debug(f"Aggregation cube built in {time.perf_counter() - start:.3f}s")
+    return totals, groups
+
+
+def _write_json(path, content):
+    with open(path, 'w') as file:
+        json.dump(content, file, default=str)
+
+
+def save_cube(file_path, totals, groups):
+    """
+    Write the cube into a fresh directory and swap it in. totals.json is written last,
+    a directory without it is incomplete.
+    """
+    path = cube_path(file_path)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+    try:
+        for category, group in groups.items():
+            _write_json(os.path.join(tmp_path, group_name(category)), group)
+        _write_json(os.path.join(tmp_path, TOTALS_NAME), totals)
+        remove_cube(file_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return path
+
+
+@lru_cache(maxsize=CUBE_CACHE_ENTRIES)
+def _read_json(path, version):
+    # version (mtime, size) is part of the cache key, a rebuilt cube is read again
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def _load(file_path, name):
+    """
+    A cube file, parsed once per version, when the cube is at least as new as the file; else None.
+    Callers must not modify the result, it is shared.
+    """
+    path = cube_path(file_path)
+    try:
+        if os.path.getmtime(os.path.join(path, TOTALS_NAME)) < os.path.getmtime(file_path):
+            return None
+        member = os.path.join(path, name)
+        state = os.stat(member)
+        return _read_json(member, (state.st_mtime_ns, state.st_size))
+    except (OSError, ValueError):
+        return None
+
+
+def remove_cube(file_path):
+    path = cube_path(file_path)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def group_sum(file_path, category_column, value_column):
+    """
+    Per-category sums from the cube: DataFrame [category_column, "sum"], or None when the
+    cube does not hold the pair.
+    """
+    group = _load(file_path, group_name(category_column))
+    if group is None or str(value_column) not in group["measures"]:
+        return None
+    sums = group["measures"][str(value_column)]["sum"]
+    return pd.DataFrame({category_column: group["keys"], "sum": [0 if value is None else value for value in sums]})
+
+
+def column_total(file_path, column, aggregation):
+    """
+    Whole-column aggregation (sum, count, min, max, mean) from the cube, or None when missing.
+    """
+    totals = (_load(file_path, TOTALS_NAME) or {}).get(str(column))
+    if totals is None or aggregation not in totals:
+        return None
+    return totals[aggregation]
+
+
+def numeric_columns(data):
+    return [
+        column["name"] for column in type_inference.infer_schema(data)["columns"]
+        if column["type"] == type_inference.NUMERIC
+    ]
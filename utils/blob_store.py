@@ -0,0 +1,51 @@
+import os
+import uuid
+import hashlib
+import logging
+import utils.compression as compression
+
+logger = logging.getLogger(__name__)
+
+# Uploads are written under a temporary name until their content hash is known
+TEMP_PREFIX = ".upload-"
+
+
+def hash_file(file_path, block_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def blob_name(content_hash, extension):
+    """
+    Storage name of a file: identical content always maps to the same name.
+    """
+    return f"{content_hash}{extension.lower()}"
+
+
+def temp_path(directory, extension):
+    return os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}{extension.lower()}")
+
+
+def commit_blob(tmp_path, directory, content_hash, extension):
+    """
+    Move a fully written temporary file to its content-addressed name, compressing text
+    formats with the storage codec. The hash is the one of the uncompressed content.
+    When the blob already exists the temporary copy is dropped and the stored one is reused.
+
+    Returns (filename, created).
+    """
+    filename = blob_name(content_hash, extension)
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        logger.info(f"Reusing stored blob {filename}")
+        return filename, False
+    if compression.write_options(extension):
+        compression.compress_file(tmp_path, path)
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return filename, True
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+FILE_SERVER_PATH_IMAGE = os.getenv("FILE_SERVER_PATH_IMAGE") or ''
+# Entries (one small JSON per chart) live next to the images they point to
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR") or os.path.join(FILE_SERVER_PATH_IMAGE, ".chart-cache")
+# Disk budget for cached chart images in MB, 0 disables the cache
+CHART_CACHE_MAX_MB = int(os.getenv("CHART_CACHE_MAX_MB", default="512"))
+# Entries older than this (in seconds since their last hit) are dropped
+CHART_CACHE_MAX_AGE = int(os.getenv("CHART_CACHE_MAX_AGE", default=str(7 * 24 * 3600)))
+# Seconds between full scans of the cache directory; in between the size is tracked in memory
+CHART_CACHE_SWEEP_INTERVAL = int(os.getenv("CHART_CACHE_SWEEP_INTERVAL", default="600"))
+
+_lock = threading.Lock()
+# Entry path -> [last use, image bytes], rebuilt from disk on every sweep (other processes write too)
+_index = {}
+_index_bytes = 0
+_last_sweep = None
+
+
+def enabled():
+    return CHART_CACHE_MAX_MB > 0
+
+
+def _prefix(filename):
+    """
+    Entry name prefix of a dataset, so every chart of a file can be dropped at once.
+    """
+    stem = os.path.splitext(os.path.basename(str(filename)))[0]
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in stem)
+
+
+def chart_key(filename, content_id, chart_name, x_axis, y_axis, style_version):
+    """
+    Cache key of a chart: the file and its content (hash or version), the chart and its axes
+    and the renderer style version.
+    """
+    fingerprint = json.dumps([content_id, chart_name, x_axis, y_axis, style_version], default=str)
+    return f"{_prefix(filename)}-{hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:32]}"
+
+
+def _entry_path(key):
+    return os.path.join(CHART_CACHE_DIR, key + ".json")
+
+
+def _read_entry(path):
+    try:
+        with open(path, encoding="utf-8") as entry_file:
+            return json.load(entry_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_entry(path, entry=None):
+    entry = entry or _read_entry(path)
+    if entry and entry.get("image"):
+        try:
+            os.remove(os.path.join(FILE_SERVER_PATH_IMAGE, entry["image"]))
+        except OSError:
+            pass
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def get(key):
+    """
+    Stored response of a chart, or None. A hit refreshes the entry's age.
+    """
+    if not enabled():
+        return None
+    path = _entry_path(key)
+    entry = _read_entry(path)
+    if entry is None:
+        return None
+    image_path = os.path.join(FILE_SERVER_PATH_IMAGE, entry["image"])
+    try:
+        expired = time.time() - os.path.getmtime(path) > CHART_CACHE_MAX_AGE
+        if not expired and os.path.exists(image_path):
+            os.utime(path)
+            with _lock:
+                if path in _index:
+                    _index[path][0] = time.time()
+            return entry["response"]
+    except OSError:
+        # Evicted by another request or process in the meantime
+        return None
+    _forget(path)
+    _remove_entry(path, entry)
+    return None
+
+
+def store(key, response, image):
+    """
+    Remember the response of a chart whose image file (in the image directory) is image.
+    """
+    global _index_bytes
+    if not enabled():
+        return
+    try:
+        size = os.path.getsize(os.path.join(FILE_SERVER_PATH_IMAGE, image))
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        tmp_path = os.path.join(CHART_CACHE_DIR, f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as entry_file:
+            json.dump({"response": response, "image": image, "bytes": size}, entry_file, default=str)
+        path = _entry_path(key)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache chart {key}: {e}")
+        return
+
+    with _lock:
+        if _last_sweep is not None:
+            _index_bytes += size - _index.get(path, [0, 0])[1]
+            _index[path] = [time.time(), size]
+    due = _last_sweep is None or time.time() - _last_sweep > CHART_CACHE_SWEEP_INTERVAL
+    if due or _index_bytes > CHART_CACHE_MAX_MB * 1024 * 1024:
+        evict(sweep=due)
+
+
+def _forget(path):
+    global _index_bytes
+    with _lock:
+        entry = _index.pop(path, None)
+        if entry is not None:
+            _index_bytes -= entry[1]
+
+
+def _sweep():
+    """
+    Rebuild the size index from the cache directory, dropping entries past the maximum age.
+    Called with _lock held.
+    """
+    global _index, _index_bytes, _last_sweep
+    _index = {}
+    now = time.time()
+    for name in os.listdir(CHART_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(CHART_CACHE_DIR, name)
+        entry = _read_entry(path)
+        try:
+            used = os.path.getmtime(path)
+        except OSError:
+            continue
+        if entry is None or now - used > CHART_CACHE_MAX_AGE:
+            _remove_entry(path, entry)
+            continue
+        _index[path] = [used, entry.get("bytes", 0)]
+    _index_bytes = sum(size for _, size in _index.values())
+    _last_sweep = now
+
+
+def evict(sweep=True):
+    """
+    Drop entries past the maximum age (with sweep, a full scan of the directory), then the
+    least recently used ones until the images fit the disk budget.
+    """
+    global _index_bytes
+    with _lock:
+        if sweep or _last_sweep is None:
+            _sweep()
+        max_bytes = CHART_CACHE_MAX_MB * 1024 * 1024
+        if _index_bytes <= max_bytes:
+            return
+        for path, (_, size) in sorted(_index.items(), key=lambda item: item[1][0]):
+            if _index_bytes <= max_bytes:
+                break
+            _remove_entry(path)
+            del _index[path]
+            _index_bytes -= size
+
+
+def invalidate(filename):
+    """
+    Drop every cached chart of a dataset file.
+    """
+    if not os.path.isdir(CHART_CACHE_DIR):
+        return
+    prefix = _prefix(filename)
+    for name in os.listdir(CHART_CACHE_DIR):
+        if name.endswith(".json") and name[:-len(".json")].rsplit("-", 1)[0] == prefix:
+            path = os.path.join(CHART_CACHE_DIR, name)
+            _forget(path)
+            _remove_entry(path)
@@ -0,0 +1,72 @@
+import time
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BOOLEAN_VALUES = ['true', 'false', '0', '1']
+# YYYY-MM-DD, MM/DD/YYYY and DD-MM-YYYY
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}'
+SAMPLE_VALUES = 5
+
+
+def _type_counts(series):
+    """
+    Per-value classification counts, first match wins: numeric, boolean, date, string.
+    Text is classified once per distinct value and weighted by its frequency.
+    """
+    total = len(series)
+    if pd.api.types.is_bool_dtype(series.dtype):
+        boolean = int(series.notna().sum())
+        return {"numeric": 0, "string": total - boolean, "boolean": boolean, "date": 0}
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        numeric = int(series.notna().sum())
+        return {"numeric": numeric, "string": total - numeric, "boolean": 0, "date": 0}
+
+    frequencies = series.dropna().astype(str).value_counts(sort=False)
+    values = frequencies.index.to_series(index=frequencies.index)
+    numeric = pd.to_numeric(values.str.strip(), errors='coerce').notna() & (values != '')
+    boolean = ~numeric & values.str.lower().isin(BOOLEAN_VALUES)
+    date = ~numeric & ~boolean & values.str.fullmatch(DATE_PATTERN)
+    counts = {
+        "numeric": int(frequencies[numeric].sum()),
+        "boolean": int(frequencies[boolean].sum()),
+        "date": int(frequencies[date].sum()),
+    }
+    counts["string"] = total - sum(counts.values())
+    return {key: counts[key] for key in ["numeric", "string", "boolean", "date"]}
+
+
+def _is_nullable(series):
+    if series.isna().any():
+        return True
+    return bool(series.dtype == object and (series == '').any())
+
+
+def profile_column(series):
+    """
+    Value counts, type parse rates (percent), samples and null flag of one column.
+    """
+    total = len(series)
+    unique = int(series.nunique(dropna=False))
+    counts = _type_counts(series)
+    samples = series.head(SAMPLE_VALUES)
+    return {
+        "name": series.name,
+        "total_values": total,
+        "unique_values": unique,
+        "unique_percentage": round(unique / total * 100, 2) if total else 0,
+        "data_types": {key: round(value / total * 100, 2) if total else 0 for key, value in counts.items()},
+        "sample_values": samples.astype(str).mask(samples.isna(), '').tolist(),
+        "is_nullable": _is_nullable(series),
+    }
+
+
+def profile_columns(data):
+    """
+    Profile every column of a DataFrame, in column order.
+    """
+    start = time.perf_counter()
+    profile = [profile_column(data[name]) for name in data.columns]
+    logger.debug("Column profile of %d columns took %.3fs", len(profile), time.perf_counter() - start)
+    return profile
@@ -0,0 +1,90 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRINGS = True
+except ImportError:
+    ARROW_STRINGS = False
+
+# Opt-in: compact the DataFrames returned (and cached) by the dataset loader
+DATASET_COMPACT_DTYPES = os.getenv("DATASET_COMPACT_DTYPES", default="false").lower() in ["1", "true", "yes"]
+
+# A text column becomes categorical when distinct values / non-null values is at most this ratio
+CATEGORY_MAX_RATIO = float(os.getenv("DATASET_CATEGORY_MAX_RATIO", default="0.5"))
+
+
+def is_text_dtype(dtype):
+    """
+    True for every dtype holding text: object, category and the string dtypes.
+    """
+    return dtype == object or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def memory_bytes(data):
+    return int(data.memory_usage(deep=True).sum())
+
+
+def _downcast_float(series):
+    downcast = series.astype(np.float32)
+    same = (downcast.astype(np.float64) == series) | series.isna()
+    return downcast if same.all() else series
+
+
+def compact_column(series, category_ratio=CATEGORY_MAX_RATIO, arrow_strings=ARROW_STRINGS):
+    """
+    Smallest lossless representation of one column.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series.dtype):
+        return _downcast_float(series)
+    if series.dtype != object:
+        return series
+
+    # Only pure text columns are converted, mixed columns keep their Python objects
+    if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return series
+    non_null = series.count()
+    if non_null and series.nunique() <= category_ratio * non_null:
+        return series.astype('category')
+    if arrow_strings:
+        return series.astype('string[pyarrow]')
+    return series
+
+
+def compact_dtypes(data, category_ratio=CATEGORY_MAX_RATIO, arrow_strings=ARROW_STRINGS):
+    """
+    Convert low-cardinality text to category, downcast numbers where lossless and store the
+    remaining text as Arrow strings.
+
+    Returns (data, report) where report holds the memory before and after and the dtype
+    changes per column.
+    """
+    before = memory_bytes(data)
+    changes = {}
+    for name in data.columns:
+        series = data[name]
+        compacted = compact_column(series, category_ratio=category_ratio, arrow_strings=arrow_strings)
+        if compacted is not series:
+            data[name] = compacted
+            if str(compacted.dtype) != str(series.dtype):
+                changes[str(name)] = [str(series.dtype), str(compacted.dtype)]
+    after = memory_bytes(data)
+    report = {
+        "before_bytes": before,
+        "after_bytes": after,
+        "ratio": round(before / after, 2) if after else None,
+        "columns": changes,
+    }
+    return data, report
@@ -0,0 +1,121 @@
+import os
+import gzip
+import uuid
+import shutil
+import logging
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Codec used when datasets are written to storage: none, zstd or gzip.
+# Compressed CSV/TXT blobs cannot be seeked, so they get no row index and pages parse the whole file
+DATASET_COMPRESSION = os.getenv("DATASET_COMPRESSION", default="none").lower()
+ZSTD_LEVEL = int(os.getenv("DATASET_COMPRESSION_ZSTD_LEVEL", default="3"))
+GZIP_LEVEL = int(os.getenv("DATASET_COMPRESSION_GZIP_LEVEL", default="6"))
+
+# Text formats only, xlsx is already a zip archive
+COMPRESSIBLE_EXTENSIONS = ['.csv', '.txt', '.json']
+
+MAGIC_BYTES = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+
+
+def storage_codec(codec=None):
+    """
+    Codec to write with, or None for plain files. zstd falls back to gzip when the
+    zstandard package is not installed.
+    """
+    codec = (codec or DATASET_COMPRESSION).lower()
+    if codec in ['', 'none', 'off']:
+        return None
+    if codec == 'zstd' and not ZSTD_AVAILABLE:
+        logger.warning("zstandard is not installed, compressing datasets with gzip")
+        return 'gzip'
+    if codec not in MAGIC_BYTES.values():
+        raise ValueError(f"Unsupported compression codec: {codec}")
+    return codec
+
+
+def detect_codec(file_path):
+    """
+    Codec of a stored file from its magic bytes; None for uncompressed files.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            head = file.read(4)
+    except OSError:
+        return None
+    for magic, codec in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def open_stream(file_path):
+    """
+    Binary stream over the decompressed content; plain files are opened as they are.
+    """
+    codec = detect_codec(file_path)
+    if codec == 'gzip':
+        return gzip.open(file_path, 'rb')
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    return open(file_path, 'rb')
+
+
+def read_options(file_path):
+    """
+    compression argument for pandas readers, None for uncompressed files.
+    """
+    codec = detect_codec(file_path)
+    return {"method": codec} if codec else None
+
+
+def write_options(extension=".csv", codec=None):
+    """
+    compression argument for pandas writers following the storage codec.
+    """
+    codec = storage_codec(codec)
+    if codec is None or extension.lower() not in COMPRESSIBLE_EXTENSIONS:
+        return None
+    if codec == 'zstd':
+        return {"method": "zstd", "level": ZSTD_LEVEL}
+    return {"method": "gzip", "compresslevel": GZIP_LEVEL}
+
+
+def compress_file(source_path, target_path, codec=None):
+    """
+    Stream source_path into target_path through the storage codec.
+    Returns the codec used, or None when the file was copied as it is.
+    """
+    codec = storage_codec(codec)
+    # Unique per call, concurrent writers of the same target never share a temporary file
+    tmp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(source_path, 'rb') as source:
+            if codec == 'zstd':
+                with open(tmp_path, 'wb') as target:
+                    zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(source, target)
+            elif codec == 'gzip':
+                with gzip.open(tmp_path, 'wb', compresslevel=GZIP_LEVEL) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+            else:
+                with open(tmp_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return codec
@@ -0,0 +1,124 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for parsed datasets kept in this process (in MB).
+DATASET_CACHE_MAX_MB = int(os.getenv("DATASET_CACHE_MAX_MB", default="512"))
+
+
+def normalize_path(file_path):
+    return os.path.normcase(os.path.abspath(os.path.normpath(str(file_path))))
+
+
+def cache_key(file_path, **options):
+    """
+    Build the cache key for a dataset: (path, mtime, size, loader options).
+    Returns None when the file does not exist.
+    """
+    path = normalize_path(file_path)
+    try:
+        file_state = os.stat(path)
+    except OSError:
+        return None
+    return (path, file_state.st_mtime_ns, file_state.st_size, tuple(sorted(options.items())))
+
+
+class DatasetCache:
+    """
+    Process-wide LRU cache of parsed DataFrames bounded by a memory budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, data):
+        size = int(data.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            logger.info(f"Dataset {key[0]} ({size} bytes) exceeds the cache budget, not cached.")
+            return
+
+        with self._lock:
+            # Older versions of the same file can never be hit again, other projections
+            # and options of this version stay cached
+            self._discard(lambda k: k[0] == key[0] and k[1:3] != key[1:3])
+            self._entries[key] = (data, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, file_path):
+        path = normalize_path(file_path)
+        with self._lock:
+            self._discard(lambda k: k[0] == path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _discard(self, predicate):
+        for key in [k for k in self._entries if predicate(k)]:
+            _, size = self._entries.pop(key)
+            self.current_bytes -= size
+
+
+dataset_cache = DatasetCache(max_bytes=DATASET_CACHE_MAX_MB * 1024 * 1024)
+
+
+def load_cached(file_path, loader, **options):
+    """
+    Return the DataFrame for file_path from the cache, calling loader() on a miss.
+
+    Callers get their own copy, so in-place changes never leak into the cache.
+    """
+    key = cache_key(file_path, **options)
+    if key is None:
+        return loader()
+
+    data = dataset_cache.get(key)
+    if data is None:
+        data = loader()
+        if data is None:
+            return None
+        dataset_cache.put(key, data)
+    return data.copy()
+
+
+def invalidate(file_path):
+    dataset_cache.invalidate(file_path)
@@ -0,0 +1,613 @@
+import os
+import io
+import csv
+import time
+import logging
+import threading
+from collections import Counter
+import chardet
+import openpyxl
+import pandas as pd
+from dotenv import load_dotenv
+
+import utils.dataset_cache as dataset_cache
+import utils.dataset_sidecar as dataset_sidecar
+import utils.row_index as row_index
+import utils.compression as compression
+import utils.json_stream as json_stream
+import utils.compact_dtypes as compact_dtypes
+import utils.numeric_parser as numeric_parser
+import utils.chart_cache as chart_cache
+import utils.aggregate_cube as aggregate_cube
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_TYPES = ['csv', 'txt', 'json', 'xlsx', 'xls']
+DELIMITERS = [',', ';', '\t', '|']
+DEFAULT_CHUNKSIZE = 1000
+DIALECT_SAMPLE_SIZE = 64 * 1024
+DIALECT_FIELDS = ["encoding", "delimiter", "quotechar", "header_row", "line_terminator"]
+
+# Default parse engine, can be overridden per format with DATASET_LOADER_ENGINE_<TYPE>
+DATASET_LOADER_ENGINE = os.getenv("DATASET_LOADER_ENGINE", default="c")
+
+
+def file_version(file_path):
+    """
+    Identifies one version of a stored file, it changes whenever the file is rewritten.
+    """
+    try:
+        file_state = os.stat(file_path)
+    except OSError:
+        return None
+    return f"{file_state.st_mtime_ns}-{file_state.st_size}"
+
+
+def get_file_type(file_path):
+    return os.path.splitext(str(file_path))[1].lower().replace('.', '').strip()
+
+
+def default_engine(file_type):
+    return os.getenv(f"DATASET_LOADER_ENGINE_{file_type.upper()}", default=DATASET_LOADER_ENGINE)
+
+
+def detect_encoding(file_path, sample_size=1000):
+    with compression.open_stream(file_path) as raw_data:
+        result = chardet.detect(raw_data.read(sample_size))
+    return result['encoding'] or 'utf-8'
+
+
+def _detect_header_row(lines, delimiter, quotechar):
+    """
+    Index of the header among non-blank lines: the first line at least as wide as the modal
+    field count. Narrower title or note lines exported above the real table are skipped this
+    way, a header wider than sparse rows that drop their trailing fields is kept.
+    """
+    widths = [len(row) for row in csv.reader(lines, delimiter=delimiter, quotechar=quotechar)]
+    if not widths:
+        return 0
+    modal_width = Counter(widths).most_common(1)[0][0]
+    return next(index for index, width in enumerate(widths) if width >= modal_width)
+
+
+def detect_dialect(file_path, sample_size=DIALECT_SAMPLE_SIZE):
+    """
+    Detect encoding, delimiter, quote character, header row and line terminator once.
+    The result is stored on the File record and passed back to every later read.
+    """
+    with compression.open_stream(file_path) as raw_data:
+        raw = raw_data.read(sample_size)
+    return dialect_from_sample(raw, get_file_type(file_path), truncated=len(raw) == sample_size)
+
+
+def dialect_from_sample(raw, file_type, truncated=False):
+    """
+    Dialect of a file from the raw bytes at its start.
+    truncated means the sample stops mid-file, so its last line may be incomplete.
+    """
+    encoding = chardet.detect(raw)['encoding'] or 'utf-8'
+    if encoding.lower() == 'ascii':
+        # A pure ASCII sample says nothing about the rest of the file, utf-8 is a superset
+        encoding = 'utf-8'
+    dialect = {
+        "encoding": encoding,
+        "delimiter": None,
+        "quotechar": None,
+        "header_row": None,
+        "line_terminator": None,
+    }
+    if file_type not in ['csv', 'txt']:
+        return dialect
+
+    text = raw.decode(encoding, errors='replace')
+    if truncated:
+        # Only keep complete lines so the sniffer never sees a truncated row
+        text = text[:text.rfind('\n') + 1] or text
+
+    if '\r\n' in text:
+        dialect["line_terminator"] = '\r\n'
+    elif '\r' in text and '\n' not in text:
+        dialect["line_terminator"] = '\r'
+    else:
+        dialect["line_terminator"] = '\n'
+
+    try:
+        sniffed = csv.Sniffer().sniff(text, delimiters=''.join(DELIMITERS))
+        dialect["delimiter"] = sniffed.delimiter
+        dialect["quotechar"] = sniffed.quotechar or '"'
+    except csv.Error:
+        dialect["delimiter"] = ','
+        dialect["quotechar"] = '"'
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    dialect["header_row"] = _detect_header_row(lines, dialect["delimiter"], dialect["quotechar"])
+    return dialect
+
+
+def dialect_from_record(record):
+    """
+    Stored dialect of a raw files document (pymongo dict), or None if never detected.
+    """
+    if not record or not record.get("encoding"):
+        return None
+    return {field: record.get(field) for field in DIALECT_FIELDS}
+
+
+def csv_options(file_path, file_type, dialect=None):
+    """
+    Options shared by every CSV/TXT engine so all endpoints parse a file the same way.
+    """
+    dialect = dialect or detect_dialect(file_path)
+    options = {
+        "encoding": dialect["encoding"] or 'utf-8',
+        "sep": dialect["delimiter"] or ',',
+        "quotechar": dialect["quotechar"] or '"',
+        "header": dialect["header_row"] if dialect["header_row"] is not None else 0,
+        "on_bad_lines": "skip",
+    }
+    # pandas handles \n and \r\n itself, only a bare \r needs to be spelled out
+    if dialect["line_terminator"] == '\r':
+        options["lineterminator"] = '\r'
+    # Stored files may be compressed, pandas decompresses them as a stream
+    codec = compression.read_options(file_path)
+    if codec:
+        options["compression"] = codec
+    return options
+
+
+def match_columns(available, columns):
+    """
+    Names in available that were requested; requests use stripped column names.
+    """
+    wanted = {str(col).strip() for col in columns}
+    return [col for col in available if str(col).strip() in wanted]
+
+
+def select_columns(data, columns=None):
+    if data is None or not columns:
+        return data
+    return data[match_columns(data.columns, columns)]
+
+
+def _csv_usecols(file_path, options, columns):
+    if not columns:
+        return None
+    try:
+        header = pd.read_csv(file_path, nrows=0, **options).columns
+    except UnicodeDecodeError:
+        header = pd.read_csv(file_path, nrows=0, **dict(options, encoding="latin1")).columns
+    return match_columns(header, columns)
+
+
+def _read_csv(file_path, options, **kwargs):
+    try:
+        return pd.read_csv(file_path, **options, **kwargs)
+    except UnicodeDecodeError:
+        return pd.read_csv(file_path, **dict(options, encoding="latin1"), **kwargs)
+
+
+def _read_other(file_path, file_type, dialect=None, columns=None):
+    if file_type == 'json':
+        encoding = dialect["encoding"] if dialect else None
+        chunks = [select_columns(chunk, columns) for chunk in iter_json(file_path, encoding=encoding)]
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    if file_type in ['xlsx', 'xls']:
+        usecols = None
+        if columns:
+            wanted = {str(col).strip() for col in columns}
+            usecols = lambda col: str(col).strip() in wanted
+        return pd.read_excel(file_path, usecols=usecols)
+    raise ValueError(f"Unsupported file format: {file_type}")
+
+
+def read_with_c_engine(file_path, file_type, dialect=None, columns=None):
+    if file_type in ['csv', 'txt']:
+        options = csv_options(file_path, file_type, dialect)
+        return _read_csv(file_path, options, engine="c", usecols=_csv_usecols(file_path, options, columns))
+    return _read_other(file_path, file_type, dialect, columns)
+
+
+def read_with_pyarrow_engine(file_path, file_type, dialect=None, columns=None):
+    if file_type in ['csv', 'txt']:
+        options = csv_options(file_path, file_type, dialect)
+        options.pop("lineterminator", None)
+        return _read_csv(file_path, options, engine="pyarrow", usecols=_csv_usecols(file_path, options, columns))
+    return _read_other(file_path, file_type, dialect, columns)
+
+
+def read_with_chunked_engine(file_path, file_type, dialect=None, columns=None):
+    chunks = [select_columns(chunk, columns) for chunk in iter_dataset(file_path, dialect=dialect)]
+    if not chunks:
+        return None
+    return pd.concat(chunks, ignore_index=True)
+
+
+ENGINES = {
+    "c": read_with_c_engine,
+    "pyarrow": read_with_pyarrow_engine,
+    "chunked": read_with_chunked_engine,
+}
+
+
+def register_engine(name, reader):
+    """
+    Register a parse engine: reader(file_path, file_type, dialect=None, columns=None) -> DataFrame.
+    When columns is given the engine should parse only those columns.
+    """
+    ENGINES[name] = reader
+
+
+def read_dataset(file_path, engine=None, use_sidecar=True, dialect=None, columns=None):
+    """
+    Parse a dataset file into a DataFrame, preferring its Parquet sidecar.
+    With columns set, only those columns are parsed (matched on stripped names).
+    Returns None when the file is missing or cannot be parsed.
+    """
+    file_type = get_file_type(file_path)
+    if file_type not in SUPPORTED_TYPES:
+        logger.error(f"Unsupported file format: {file_path}")
+        return None
+
+    if use_sidecar and dataset_sidecar.has_sidecar(file_path):
+        try:
+            if columns:
+                columns = match_columns(dataset_sidecar.sidecar_columns(file_path), columns)
+            return dataset_sidecar.read_sidecar(file_path, columns=columns)
+        except Exception as e:
+            logger.warning(f"Error reading sidecar, falling back to {file_path}: {e}")
+
+    engine = engine or default_engine(file_type)
+    try:
+        return ENGINES[engine](file_path, file_type, dialect, columns)
+    except FileNotFoundError as e:
+        logger.error(e)
+    except Exception as e:
+        logger.error(f"Error loading dataset {file_path} with engine '{engine}': {e}")
+    return None
+
+
+def load_dataframe(file_path, engine=None, dialect=None, columns=None, compact=False):
+    """
+    Cached read_dataset: repeated requests on the same file version share one parse.
+    With compact=True the cached frame uses categories, downcast numbers and Arrow strings.
+    """
+    def read():
+        data = read_dataset(file_path, engine=engine, dialect=dialect, columns=columns)
+        if compact and data is not None:
+            data, report = compact_dtypes.compact_dtypes(data)
+            logger.info(
+                f"Compacted {file_path}: {report['before_bytes']} -> {report['after_bytes']} bytes "
+                f"(x{report['ratio']}), {report['columns']}"
+            )
+        return data
+
+    return dataset_cache.load_cached(
+        file_path,
+        read,
+        engine=engine or default_engine(get_file_type(file_path)),
+        dialect=tuple(sorted(dialect.items())) if dialect else None,
+        columns=tuple(sorted(str(col).strip() for col in columns)) if columns else None,
+        compact=bool(compact),
+    )
+
+
+def strip_column_names(data):
+    return data.rename(columns=lambda col: str(col).strip())
+
+
+def coerce_numeric_columns(data, columns):
+    """
+    Parse the given text columns as numbers, in place, with the number format detected per
+    column (currency, percent, separators, negatives in parentheses).
+    Columns that already have a numeric dtype are left as they are.
+    """
+    for col in columns:
+        if compact_dtypes.is_text_dtype(data[col].dtype):
+            data[col] = numeric_parser.parse_numbers(data[col])
+    return data
+
+
+def nulls_to_none(data):
+    """
+    Replace missing values with None in object columns only; numeric columns keep NaN and their dtype.
+    """
+    objects = data.select_dtypes(include="object").columns
+    if len(objects):
+        data[objects] = data[objects].where(data[objects].notnull(), None)
+    return data
+
+
+def read_preview(file_path, size, dialect=None):
+    """
+    Parse only the first size rows of a dataset.
+    """
+    file_type = get_file_type(file_path)
+    if dataset_sidecar.has_sidecar(file_path):
+        try:
+            return dataset_sidecar.read_sidecar_head(file_path, size)
+        except Exception as e:
+            logger.warning(f"Error reading sidecar, falling back to {file_path}: {e}")
+
+    try:
+        if file_type in ['csv', 'txt']:
+            return _read_csv(file_path, csv_options(file_path, file_type, dialect), nrows=size)
+        if file_type == 'xls':
+            return pd.read_excel(file_path, nrows=size)
+        if file_type in ['xlsx', 'json']:
+            return next(iter_dataset(file_path, chunksize=size, dialect=dialect), None)
+    except Exception as e:
+        logger.error(f"Error previewing dataset {file_path}: {e}")
+    return None
+
+
+def count_rows(file_path, dialect=None, row_count=None):
+    """
+    Row count without a full parse: the count recorded at ingest (row_count, File.row_count)
+    when known, then the stored index or sidecar metadata, then a newline count for CSV/TXT.
+    Other formats fall back to the cached load.
+    """
+    if row_count is not None:
+        return row_count
+
+    index = row_index.load_row_index(file_path)
+    if index is not None:
+        return index["rows"]
+
+    if dataset_sidecar.has_sidecar(file_path):
+        try:
+            return dataset_sidecar.sidecar_row_count(file_path)
+        except Exception as e:
+            logger.warning(f"Error reading sidecar metadata for {file_path}: {e}")
+
+    file_type = get_file_type(file_path)
+    if file_type in ['csv', 'txt']:
+        options = csv_options(file_path, file_type, dialect)
+        return max(0, row_index.count_lines(file_path) - options["header"] - 1)
+
+    data = load_dataframe(file_path, dialect=dialect)
+    return len(data) if data is not None else 0
+
+
+def iter_dataset(file_path, chunksize=DEFAULT_CHUNKSIZE, dialect=None):
+    """
+    Yield the dataset as DataFrame chunks of at most chunksize rows.
+    """
+    file_type = get_file_type(file_path)
+
+    if file_type in ['csv', 'txt']:
+        options = csv_options(file_path, file_type, dialect)
+        reader = pd.read_csv(file_path, chunksize=chunksize, **options)
+        try:
+            first = next(reader, None)
+        except UnicodeDecodeError:
+            reader = pd.read_csv(file_path, chunksize=chunksize, **dict(options, encoding="latin1"))
+            first = next(reader, None)
+        if first is None:
+            return
+        yield first
+        yield from reader
+
+    elif file_type == 'json':
+        yield from iter_json(file_path, chunksize=chunksize, encoding=dialect["encoding"] if dialect else None)
+
+    elif file_type == 'xlsx':
+        yield from iter_excel(file_path, chunksize=chunksize)
+
+    elif file_type == 'xls':
+        # Legacy binary workbooks have no streaming parser, they are read whole
+        data = pd.read_excel(file_path)
+        for start in range(0, len(data), chunksize):
+            yield data.iloc[start:start + chunksize]
+
+    else:
+        raise ValueError(f"Unsupported file format: {file_type}")
+
+
+def _json_frame(records, columns):
+    """
+    Flatten a batch of records into a DataFrame whose columns stay aligned with earlier batches.
+    Nested objects become dotted columns (a.b), keys first seen later are appended.
+    """
+    records = [record if isinstance(record, dict) else {0: record} for record in records]
+    if any(isinstance(value, dict) for record in records for value in record.values()):
+        data = pd.json_normalize(records)
+    else:
+        # Flat records need no normalisation, the plain constructor is much faster
+        data = pd.DataFrame.from_records(records)
+    columns.extend(name for name in data.columns if name not in columns)
+    return data.reindex(columns=columns)
+
+
+def iter_json(file_path, chunksize=DEFAULT_CHUNKSIZE, encoding=None):
+    """
+    Stream a JSON array of records or JSON Lines as DataFrame chunks of at most chunksize rows.
+    Records are decoded incrementally, the document is never loaded whole.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    with compression.open_stream(file_path) as raw:
+        reader = json_stream.JSONStreamReader(io.TextIOWrapper(raw, encoding=encoding, errors='replace'))
+        columns = []
+        records = []
+        for record in reader:
+            if (not records and not columns and reader.layout == json_stream.LINES
+                    and _is_column_oriented(record) and reader.at_end()):
+                # A single {column: {row: value}} document, as written by DataFrame.to_json();
+                # JSON Lines whose records only hold objects go on below
+                data = pd.DataFrame(record).reset_index(drop=True)
+                for start in range(0, len(data), chunksize):
+                    yield data.iloc[start:start + chunksize]
+                return
+            records.append(record)
+            if len(records) >= chunksize:
+                yield _json_frame(records, columns)
+                records = []
+        if records:
+            yield _json_frame(records, columns)
+
+
+def _is_column_oriented(record):
+    return isinstance(record, dict) and bool(record) and all(isinstance(value, dict) for value in record.values())
+
+
+def _excel_header(values):
+    """
+    Column names from the header row, named and de-duplicated the way read_excel does.
+    """
+    header = []
+    seen = Counter()
+    for position, value in enumerate(values):
+        name = f"Unnamed: {position}" if value is None or str(value).strip() == '' else value
+        if seen[name]:
+            renamed = f"{name}.{seen[name]}"
+            seen[name] += 1
+            name = renamed
+        seen[name] += 1
+        header.append(name)
+    return header
+
+
+def iter_excel(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=None):
+    """
+    Stream the first (or given) sheet of an xlsx workbook as DataFrame chunks.
+    The workbook is opened read-only, so rows are parsed one at a time and memory
+    stays bounded by chunksize whatever the size of the sheet.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        header = None
+        rows = []
+        for values in worksheet.iter_rows(values_only=True):
+            if all(value is None for value in values):
+                continue
+            if header is None:
+                header = _excel_header(values)
+                continue
+            rows.append(values[:len(header)])
+            if len(rows) >= chunksize:
+                yield pd.DataFrame.from_records(rows, columns=header).infer_objects()
+                rows = []
+        if rows:
+            yield pd.DataFrame.from_records(rows, columns=header).infer_objects()
+    finally:
+        workbook.close()
+
+
+def build_sidecar(file_path, dialect=None):
+    """
+    Parse the original file once and store it as a typed Parquet sidecar.
+    """
+    if get_file_type(file_path) not in SUPPORTED_TYPES:
+        return False
+    dataset_sidecar.remove_sidecar(file_path)
+    data = read_dataset(file_path, use_sidecar=False, dialect=dialect)
+    return dataset_sidecar.write_sidecar(file_path, data)
+
+
+def build_row_index(file_path, dialect=None):
+    file_type = get_file_type(file_path)
+    if file_type not in ['csv', 'txt']:
+        return None
+    try:
+        return row_index.build_row_index(file_path, csv_options(file_path, file_type, dialect))
+    except Exception as e:
+        logger.warning(f"Could not build row index for {file_path}: {e}")
+        return None
+
+
+def build_cube(file_path, dialect=None):
+    """
+    Precompute the aggregation cube (per-category sums, counts, min, max, means) of a dataset.
+    """
+    if get_file_type(file_path) not in SUPPORTED_TYPES:
+        return None
+    try:
+        data = load_dataframe(file_path, dialect=dialect)
+        if data is None or data.empty:
+            return None
+        # Same column names and numeric parsing as the chart loader
+        data = strip_column_names(data)
+        numeric_columns = aggregate_cube.numeric_columns(data)
+        data = coerce_numeric_columns(data, numeric_columns)
+        totals, groups = aggregate_cube.build_cube(data, numeric_columns)
+        # The file may have been removed while the cube was computed
+        if not os.path.exists(file_path):
+            return None
+        return aggregate_cube.save_cube(file_path, totals, groups)
+    except Exception as e:
+        logger.warning(f"Could not build aggregation cube for {file_path}: {e}")
+        return None
+
+
+def build_cube_in_background(file_path, dialect=None):
+    """
+    Build the aggregation cube in a daemon thread so ingest does not wait for it.
+    """
+    thread = threading.Thread(
+        target=build_cube, args=(file_path,), kwargs={"dialect": dialect},
+        name=f"cube-{os.path.basename(str(file_path))}", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def prepare_dataset(file_path, dialect=None):
+    """
+    Ingest hook: build every derived artifact (Parquet sidecar, row index, aggregation cube) once.
+    """
+    remove_derived(file_path)
+    build_sidecar(file_path, dialect=dialect)
+    build_row_index(file_path, dialect=dialect)
+    build_cube_in_background(file_path, dialect=dialect)
+
+
+def load_rows(file_path, dialect=None, formatter=None):
+    """
+    Paginate-able rows of a dataset that parse only the requested slice.
+    Returns None when the file has no usable row index.
+    """
+    index = row_index.load_row_index(file_path)
+    if index is None:
+        return None
+    options = csv_options(file_path, get_file_type(file_path), dialect)
+    return row_index.IndexedRows(file_path, index, options, formatter=formatter)
+
+
+def remove_derived(file_path):
+    """
+    Drop every artifact derived from file_path (cached frames, sidecars, row index, cube, charts).
+    """
+    dataset_cache.invalidate(file_path)
+    dataset_sidecar.remove_sidecar(file_path)
+    row_index.remove_row_index(file_path)
+    aggregate_cube.remove_cube(file_path)
+    chart_cache.invalidate(file_path)
+
+
+def benchmark_engines(file_path, engines=None, repeat=3):
+    """
+    Time each engine on file_path (sidecar and cache bypassed).
+    Returns {engine: {"seconds": best time, "rows": row count}}.
+    """
+    results = {}
+    file_type = get_file_type(file_path)
+    dialect = detect_dialect(file_path)
+    for engine in engines or ENGINES.keys():
+        timings = []
+        rows = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                data = ENGINES[engine](file_path, file_type, dialect, None)
+            except Exception as e:
+                logger.warning(f"Engine '{engine}' failed on {file_path}: {e}")
+                timings = []
+                break
+            timings.append(time.perf_counter() - start)
+            rows = len(data) if data is not None else 0
+        if timings:
+            results[engine] = {"seconds": min(timings), "rows": rows}
+    return results
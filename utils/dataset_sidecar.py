@@ -0,0 +1,178 @@
+import os
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+SIDECAR_SUFFIX = ".parquet"
+
+
+def sidecar_path(file_path):
+    return str(file_path) + SIDECAR_SUFFIX
+
+
+def has_sidecar(file_path):
+    """
+    A sidecar is only usable when it is at least as new as the original file.
+    """
+    path = sidecar_path(file_path)
+    try:
+        return os.path.getmtime(path) >= os.path.getmtime(file_path)
+    except OSError:
+        return False
+
+
+def write_sidecar(file_path, data):
+    """
+    Write the parsed DataFrame as a typed Parquet file next to the original.
+    Returns True when the sidecar was written.
+    """
+    if not PARQUET_AVAILABLE or data is None:
+        return False
+
+    path = sidecar_path(file_path)
+    tmp_path = path + ".tmp"
+    try:
+        # Parquet requires string column names
+        data = data.rename(columns=lambda col: str(col))
+        data.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not write Parquet sidecar for {file_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+class SidecarWriter:
+    """
+    Sidecar written chunk by chunk from frames that are parsed anyway (the upload pipeline),
+    so the file is not parsed a second time. The first chunk fixes the column types; a later
+    chunk that does not fit them (e.g. text in a numeric column) stops the writer, and the
+    caller builds the sidecar from the file instead.
+    """
+
+    def __init__(self, file_path):
+        self.path = sidecar_path(file_path)
+        self.tmp_path = self.path + ".tmp"
+        self.rows = 0
+        self.failed = not PARQUET_AVAILABLE
+        self._writer = None
+        self._schema = None
+
+    def write(self, data):
+        if self.failed:
+            return
+        try:
+            # Parquet requires string column names
+            data = data.rename(columns=lambda col: str(col))
+            if self._writer is None:
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            else:
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                mismatch = self._mismatch(table.schema)
+                if mismatch:
+                    logger.info(f"Streaming sidecar for {self.path} stopped: {mismatch}")
+                    self.abort()
+                    return
+                # Lossless only, a fractional value in an integer column raises
+                table = table.cast(self._schema)
+            self._writer.write_table(table)
+            self.rows += len(data)
+        except Exception as e:
+            logger.info(f"Streaming sidecar for {self.path} stopped: {e}")
+            self.abort()
+
+    def _mismatch(self, schema):
+        """
+        Why a chunk does not fit the columns fixed by the first chunk, or None when it does.
+        """
+        if schema.names != self._schema.names:
+            return f"columns {schema.names} differ from {self._schema.names}"
+        for field in schema:
+            expected = self._schema.field(field.name).type
+            # Integer columns holding nulls in a later chunk are parsed as floats by pandas
+            if field.type != expected and not (pa.types.is_integer(expected) and pa.types.is_floating(field.type)):
+                return f"column {field.name} is {field.type}, not {expected}"
+        return None
+
+    def close(self, rows=None):
+        """
+        Finish the sidecar. rows, when given, is the expected row count; a sidecar missing
+        rows (a chunk failed to parse) is dropped. Returns True when the sidecar was written.
+        """
+        if self.failed or self._writer is None:
+            self.abort()
+            return False
+        try:
+            self._writer.close()
+        except Exception as e:
+            logger.warning(f"Could not write Parquet sidecar {self.path}: {e}")
+            self.abort()
+            return False
+        if rows is not None and rows != self.rows:
+            logger.info(f"Streaming sidecar for {self.path} has {self.rows} of {rows} rows, dropped")
+            self.abort()
+            return False
+        os.replace(self.tmp_path, self.path)
+        return True
+
+    def abort(self):
+        self.failed = True
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def move_sidecar(source_path, target_path):
+    """
+    Attach the sidecar written for source_path (e.g. an upload's temporary name) to target_path.
+    """
+    path = sidecar_path(target_path)
+    os.replace(sidecar_path(source_path), path)
+    # The stored file may have been written after the sidecar (compression), it must not look stale
+    os.utime(path)
+
+
+def read_sidecar(file_path, columns=None):
+    return pd.read_parquet(sidecar_path(file_path), engine="pyarrow", columns=columns)
+
+
+def sidecar_columns(file_path):
+    return pq.ParquetFile(sidecar_path(file_path)).schema_arrow.names
+
+
+def read_sidecar_head(file_path, nrows):
+    """
+    Read only the first nrows rows, one record batch, without loading the whole file.
+    """
+    parquet_file = pq.ParquetFile(sidecar_path(file_path))
+    batch = next(parquet_file.iter_batches(batch_size=nrows), None)
+    if batch is None:
+        return pd.DataFrame(columns=parquet_file.schema_arrow.names)
+    return batch.to_pandas()
+
+
+def sidecar_row_count(file_path):
+    return pq.ParquetFile(sidecar_path(file_path)).metadata.num_rows
+
+
+def remove_sidecar(file_path):
+    path = sidecar_path(file_path)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,116 @@
+import re
+import logging
+import pandas as pd
+import utils.type_inference as type_inference
+import utils.compact_dtypes as compact_dtypes
+
+logger = logging.getLogger(__name__)
+
+# Tried in order, the first format reaching the threshold on the sample wins
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%d-%m-%Y',
+    '%m-%d-%Y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+    '%d %b %Y',
+    '%b %d, %Y',
+    '%d %B %Y',
+    '%B %d, %Y',
+]
+# Fractional seconds and UTC offsets
+ISO8601 = 'ISO8601'
+ISO8601_PATTERN = r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?'
+
+DIRECTIVES = {
+    '%Y': r'\d{4}',
+    '%m': r'\d{1,2}',
+    '%d': r'\d{1,2}',
+    '%H': r'\d{1,2}',
+    '%M': r'\d{2}',
+    '%S': r'\d{2}',
+    '%b': r'[A-Za-z]{3}',
+    '%B': r'[A-Za-z]+',
+}
+
+
+def format_pattern(fmt):
+    """
+    Regex accepting the shape of a strftime format, used to shortlist formats cheaply.
+    """
+    parts = re.split(r'(%[A-Za-z])', fmt)
+    return re.compile(''.join(DIRECTIVES.get(part, re.escape(part)) for part in parts))
+
+
+FORMAT_PATTERNS = [(fmt, format_pattern(fmt)) for fmt in DATE_FORMATS] + [(ISO8601, re.compile(ISO8601_PATTERN))]
+
+
+def _text(series):
+    text = series.dropna().astype(str).str.strip()
+    return text[text != '']
+
+
+def parse_rate(text, fmt):
+    """
+    Share of the values parsed by pandas with an explicit format.
+    """
+    if text.empty:
+        return 0.0
+    return float(pd.to_datetime(text, format=fmt, errors='coerce').notna().mean())
+
+
+def detect_date_format(series, sample_size=type_inference.TYPE_INFERENCE_SAMPLE_SIZE,
+                       threshold=type_inference.TYPE_INFERENCE_THRESHOLD):
+    """
+    Date format of a text column, or None when it does not hold dates.
+
+    The formats are shortlisted by regex on a stratified sample, the first one that parses
+    the sample with pandas is validated once on the full column with format= set.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return ISO8601
+    if not compact_dtypes.is_text_dtype(series.dtype):
+        return None
+
+    sample = _text(type_inference.stratified_sample(series, sample_size))
+    if sample.empty:
+        return None
+
+    for fmt, pattern in FORMAT_PATTERNS:
+        if sample.str.fullmatch(pattern).mean() < threshold:
+            continue
+        if parse_rate(sample, fmt) < threshold:
+            continue
+        if len(sample) == series.count() or parse_rate(_text(series), fmt) >= threshold:
+            return fmt
+        # e.g. %m/%d/%Y fits a sample without days above 12, the next format may fit the column
+        logger.debug("Date format %s matched the sample of %s but not the full column", fmt, series.name)
+    return None
+
+
+def parse_dates(series, fmt):
+    """
+    Convert a column with its detected format, unparsable values become NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    return pd.to_datetime(series, format=fmt, errors='coerce')
+
+
+def parse_date_columns(data, date_formats):
+    """
+    Convert the columns of data listed in date_formats ({name: format}) with their stored format.
+    """
+    for col, fmt in date_formats.items():
+        if col in data.columns:
+            data[col] = parse_dates(data[col], fmt)
+    return data
@@ -32,11 +32,8 @@ def handle_uploaded_file(f):
 
 
 def find_file_by_filename(filename):
-    files = os.listdir(file_server_path_file)
-    for file in files:
-        if file == filename:
-            return True
-    return False
+    # Cleansed files live in csv/, their filename keeps the directory
+    return os.path.isfile(os.path.join(file_server_path_file, filename))
 
 
 def find_file_by_name_sourse(filename):
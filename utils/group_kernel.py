@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+# Groups kept by aggregated charts, the rest is folded into OTHER_LABEL
+GROUP_TOP_K = int(os.getenv("GROUP_TOP_K", default="10"))
+OTHER_LABEL = "Other"
+
+
+def ordered_keys(keys):
+    """
+    Numbers, dates and ordered categories: keys whose axis has a scale a label cannot join.
+    """
+    dtype = pd.Index(keys).dtype
+    return (
+        pd.api.types.is_numeric_dtype(dtype)
+        or pd.api.types.is_datetime64_any_dtype(dtype)
+        or (isinstance(dtype, pd.CategoricalDtype) and dtype.ordered)
+    )
+
+
+def top_groups(keys, totals, name, value_name="sum", k=GROUP_TOP_K, other_label=OTHER_LABEL, by_key=False):
+    """
+    The k largest groups, largest first (in key order with by_key), and one other_label row
+    with the total of the rest. Ties keep the order of keys.
+    Ordered keys get no other_label row, as it would not fit their axis; when the row is
+    added every label becomes a string.
+    """
+    keys = pd.Index(keys)
+    totals = np.asarray(totals)
+    other = None
+    if len(totals) > k:
+        # Only the k largest are sorted, the partition leaves the rest unordered
+        kept = np.argpartition(-totals, k - 1)[:k]
+        kept = kept[np.lexsort((kept, -totals[kept]))]
+        if other_label is not None and not ordered_keys(keys):
+            rest = np.ones(len(totals), dtype=bool)
+            rest[kept] = False
+            other = totals[rest].sum().item()
+    else:
+        kept = np.lexsort((np.arange(len(totals)), -totals))
+    if by_key:
+        kept = kept[keys.take(kept).argsort(kind="stable")]
+
+    labels = keys.take(kept).tolist()
+    values = totals[kept].tolist()
+    if other is not None:
+        labels = [str(label) for label in labels] + [other_label]
+        values.append(other)
+    return pd.DataFrame({name: labels, value_name: values})
+
+
+def group_totals(keys, values=None, k=GROUP_TOP_K, other_label=OTHER_LABEL, by_key=False):
+    """
+    Sum of values (or row count when values is None) per distinct key, as top_groups.
+    Missing keys are dropped and missing values count as 0, like groupby(...).sum().
+    """
+    keys = pd.Series(keys)
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+    present = codes >= 0
+    # Copying around the missing keys is only paid when there are any
+    if present.all():
+        present = slice(None)
+    if values is None:
+        totals = np.bincount(codes[present], minlength=len(uniques))
+        return top_groups(uniques, totals, keys.name, "count", k, other_label, by_key)
+
+    values = pd.Series(values)
+    if values.dtype == "float64":
+        weights = values.to_numpy()
+        weights = np.where(np.isnan(weights), 0.0, weights)
+    else:
+        weights = values.to_numpy(dtype="float64", na_value=0.0)
+    totals = np.bincount(codes[present], weights=weights[present], minlength=len(uniques))
+    if pd.api.types.is_integer_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+        totals = totals.round().astype("int64")
+    return top_groups(uniques, totals, keys.name, "sum", k, other_label, by_key)
@@ -0,0 +1,164 @@
+import io
+import hashlib
+import logging
+import pandas as pd
+import utils.dataset_loader as dataset_loader
+import utils.row_index as row_index
+import utils.dataset_sidecar as dataset_sidecar
+
+logger = logging.getLogger(__name__)
+
+
+def merge_dtype(current, new):
+    """
+    Widen a column type seen in earlier chunks with the type of the next chunk.
+    """
+    if current is None or current == new:
+        return new
+    numeric = pd.api.types.is_numeric_dtype
+    if numeric(current) and numeric(new) and 'bool' not in (current, new):
+        return 'float64'
+    return 'object'
+
+
+class IngestPipeline:
+    """
+    Single pass over an upload while its chunks are written to disk.
+
+    Each chunk is hashed, the dialect is sniffed from the first bytes, then CSV/TXT rows are
+    split, counted and indexed and parsed in batches that feed the schema, an optional
+    MetadataExtractor and, with sidecar=True, the Parquet sidecar (written next to file_path).
+    Formats that cannot be split on raw bytes (JSON, Excel, non ASCII-compatible encodings)
+    are read once through iter_dataset when the upload ends.
+    """
+
+    def __init__(self, file_path, extractor=None, batch_rows=dataset_loader.DEFAULT_CHUNKSIZE, sidecar=False):
+        self.file_path = file_path
+        self.file_type = dataset_loader.get_file_type(file_path)
+        self.extractor = extractor
+        self.sidecar = dataset_sidecar.SidecarWriter(file_path) if sidecar else None
+        self.batch_rows = batch_rows
+        self.sha256 = hashlib.sha256()
+        self.dialect = None
+        self.row_count = 0
+        self.schema = {}
+        self.streaming = self.file_type in ['csv', 'txt']
+        self._sample = b''
+        self._pending = b''
+        self._batch = []
+        self._scanner = None
+        self._options = None
+
+    def feed(self, chunk):
+        self.sha256.update(chunk)
+        if not self.streaming:
+            return
+        if self.dialect is None:
+            self._sample += chunk
+            if len(self._sample) < dataset_loader.DIALECT_SAMPLE_SIZE:
+                return
+            chunk, self._sample = self._sample, b''
+            self._start(chunk, truncated=True)
+            if not self.streaming:
+                return
+        self._consume(chunk)
+
+    def finish(self):
+        """
+        Flush the last rows and return what was learned about the file.
+        The row index is returned rather than saved, the caller knows the final storage path;
+        "sidecar" tells whether the sidecar of file_path was written (see move_sidecar).
+        """
+        index = None
+        if self.streaming and self.dialect is None:
+            sample, self._sample = self._sample, b''
+            self._start(sample, truncated=False)
+            if self.streaming:
+                self._consume(sample)
+
+        if self.streaming:
+            if self._pending:
+                self._add_row(self._scanner.feed(self._pending))
+                self._pending = b''
+            self._flush()
+            self.row_count = self._scanner.rows
+            columns = self._read_header().columns if self._scanner.header.strip() else []
+            index = self._scanner.to_index(columns)
+        elif self.file_type in dataset_loader.SUPPORTED_TYPES:
+            if self.dialect is None:
+                self.dialect = dataset_loader.detect_dialect(self.file_path)
+            for data in dataset_loader.iter_dataset(self.file_path, dialect=self.dialect):
+                self.row_count += len(data)
+                self._add_frame(data)
+
+        sidecar = self.sidecar is not None and self.sidecar.close(rows=self.row_count)
+        return {
+            "content_hash": self.sha256.hexdigest(),
+            "row_count": self.row_count if self.dialect else None,
+            "schema": [{"name": str(name), "type": dtype} for name, dtype in self.schema.items()] or None,
+            "dialect": self.dialect or {},
+            "row_index": index,
+            "sidecar": bool(sidecar),
+        }
+
+    def _start(self, sample, truncated):
+        self.dialect = dataset_loader.dialect_from_sample(sample, self.file_type, truncated=truncated)
+        self._options = dataset_loader.csv_options(self.file_path, self.file_type, self.dialect)
+        if not row_index.can_index(self._options):
+            # Fall back to a read after the upload, the sample is already on disk
+            self.streaming = False
+            return
+        self._scanner = row_index.RowScanner(self._options)
+
+    def _consume(self, data):
+        data = self._pending + data
+        start = 0
+        end = data.find(b'\n')
+        while end >= 0:
+            self._add_row(self._scanner.feed(data[start:end + 1]))
+            start = end + 1
+            end = data.find(b'\n', start)
+        self._pending = data[start:]
+
+    def _add_row(self, row):
+        if row is None:
+            return
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def _read_header(self):
+        return pd.read_csv(io.BytesIO(self._scanner.header), nrows=0, **self._parse_options())
+
+    def _parse_options(self):
+        # Batches are parsed with the header row prepended, so it is always the first line
+        return dict(self._options, header=0)
+
+    def _flush(self):
+        if not self._batch:
+            return
+        raw = self._scanner.header + b''.join(self._batch)
+        self._batch = []
+        try:
+            data = pd.read_csv(io.BytesIO(raw), **self._parse_options())
+        except Exception as e:
+            logger.warning(f"Could not parse rows of {self.file_path}: {e}")
+            # The sidecar would miss these rows
+            if self.sidecar is not None:
+                self.sidecar.abort()
+            return
+        # Rows are counted by the scanner, the frame only feeds schema and statistics
+        self._add_frame(data)
+
+    def _add_frame(self, data):
+        for name in data.columns:
+            self.schema[name] = merge_dtype(self.schema.get(name), str(data[name].dtype))
+        if self.sidecar is not None:
+            self.sidecar.write(data)
+        if self.extractor is not None:
+            try:
+                self.extractor.feed(data)
+            except Exception as e:
+                # Statistics are optional, a failing column must not fail the upload
+                logger.warning(f"Metadata extraction stopped for {self.file_path}: {e}")
+                self.extractor = None
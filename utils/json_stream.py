@@ -0,0 +1,86 @@
+import json
+
+READ_SIZE = 1024 * 1024
+
+ARRAY = "array"
+LINES = "lines"
+
+
+class JSONStreamReader:
+    """
+    Incremental reader over a text stream holding either one JSON array of records or
+    JSON Lines / concatenated objects. Records are decoded one by one with
+    JSONDecoder.raw_decode, only a small window of the text is kept in memory.
+    """
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.layout = None
+
+    def _fill(self):
+        """
+        Read the next block, dropping the text that has already been decoded.
+        Returns False at the end of the stream.
+        """
+        if self.eof:
+            return False
+        block = self.stream.read(self.read_size)
+        if not block:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def _skip(self, characters):
+        """
+        Move past whitespace and the given separators; returns the next character or ''.
+        """
+        while True:
+            while self.pos < len(self.buffer) and (self.buffer[self.pos].isspace() or self.buffer[self.pos] in characters):
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _decode(self):
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value continues in the next block
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal ending exactly at the block edge may be cut short
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def at_end(self):
+        """
+        True when only whitespace is left after the last decoded value.
+        """
+        return self._skip('') == ''
+
+    def detect(self):
+        first = self._skip('\ufeff')
+        self.layout = ARRAY if first == '[' else LINES
+        if first == '[':
+            self.pos += 1
+        return self.layout
+
+    def __iter__(self):
+        if self.layout is None:
+            self.detect()
+        separators = ',' if self.layout == ARRAY else ''
+        while True:
+            char = self._skip(separators)
+            if char == '' or (self.layout == ARRAY and char == ']'):
+                return
+            yield self._decode()
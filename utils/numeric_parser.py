@@ -0,0 +1,121 @@
+import re
+import logging
+import numpy as np
+import pandas as pd
+import utils.compact_dtypes as compact_dtypes
+import utils.type_inference as type_inference
+
+logger = logging.getLogger(__name__)
+
+CURRENCY_SYMBOLS = '$€£¥฿₩₹'
+# Spaces used as thousands separators: regular, no-break and narrow no-break
+SPACES = ' \u00a0\u202f'
+# Grouping with a comma (1,234,567) or a dot (1.234.567)
+COMMA_GROUPS = re.compile(r'\d{1,3}(?:,\d{3})+(?:\.\d*)?')
+DOT_GROUPS = re.compile(r'\d{1,3}(?:\.\d{3}){2,}(?:,\d*)?')
+# A comma followed by anything but three digits can only be a decimal comma (3,5 or 12,50)
+DECIMAL_COMMA = re.compile(r'\d*,(?:\d{1,2}|\d{4,})')
+# Grouping with spaces (1 234 567) or apostrophes (1'234'567)
+SPACE_GROUPS = re.compile(f'\\d[{SPACES}]\\d{{3}}(?!\\d)')
+APOSTROPHE_GROUPS = re.compile(r"\d'\d{3}(?!\d)")
+# Columns whose sample has more distinct values than this share are parsed row by row
+REPEATED_RATIO = 0.5
+
+
+def detect_number_format(series, sample_size=type_inference.TYPE_INFERENCE_SAMPLE_SIZE):
+    """
+    Number format of a text column, detected once on a stratified sample:
+    {"decimal", "thousands", "currency", "percent", "parentheses", "exponent"}.
+    """
+    text = type_inference.stratified_sample(series, sample_size).dropna().astype(str).str.strip()
+    text = text[text != '']
+    number_format = {
+        "decimal": '.',
+        "thousands": None,
+        "currency": bool(text.str.contains(f'[{CURRENCY_SYMBOLS}]', regex=True).any()),
+        "percent": bool(text.str.contains('%', regex=False).any()),
+        "parentheses": bool(text.str.startswith('(').any()),
+        "exponent": bool(text.str.contains(r'\d[eE][-+]?\d', regex=True).any()),
+    }
+
+    # Space and apostrophe groups are dropped first, the separator rules only see commas and dots
+    digits = text.str.replace('[^0-9.,]', '', regex=True)
+    # With both separators in one value, the last one is the decimal separator
+    both = digits[digits.str.contains(',', regex=False) & digits.str.contains('.', regex=False)]
+    if not both.empty:
+        if (both.str.rfind(',') > both.str.rfind('.')).mean() > 0.5:
+            number_format.update(decimal=',', thousands='.')
+        else:
+            number_format.update(thousands=',')
+    elif digits.str.fullmatch(DECIMAL_COMMA).any() or digits.str.fullmatch(DOT_GROUPS).any():
+        number_format.update(decimal=',', thousands='.')
+    elif digits.str.fullmatch(COMMA_GROUPS).any():
+        number_format.update(thousands=',')
+
+    if text.str.contains(SPACE_GROUPS).any():
+        number_format.update(thousands=' ')
+    elif text.str.contains(APOSTROPHE_GROUPS).any():
+        number_format.update(thousands="'")
+    return number_format
+
+
+def _normalize(values, number_format):
+    """
+    Rewrite formatted numbers as plain ones with vectorized string ops.
+    """
+    negative = None
+    if number_format["parentheses"]:
+        text = values.str.strip()
+        negative = text.str.startswith('(') & text.str.endswith(')')
+    # One pass keeps digits, signs, the decimal separator and exponents; currency, percent,
+    # letters and every thousands separator are dropped
+    keep = '0-9+\\-' + re.escape(number_format["decimal"]) + ('eE' if number_format["exponent"] else '')
+    text = values.str.replace(f'[^{keep}]', '', regex=True)
+    if number_format["decimal"] != '.':
+        text = text.str.replace(number_format["decimal"], '.', regex=False)
+    numbers = pd.to_numeric(text, errors='coerce')
+    if negative is not None:
+        numbers = numbers.where(~negative, -numbers.abs())
+    return numbers
+
+
+def parse_numbers(series, number_format=None):
+    """
+    Convert a column to numbers. Text is parsed with its detected format, each distinct value
+    once; percentages keep their displayed value. Unparsable values become NaN.
+    """
+    if not compact_dtypes.is_text_dtype(series.dtype):
+        return pd.to_numeric(series, errors='coerce')
+
+    # Distinct values are parsed once, unless the sample says nearly every value is distinct
+    sample = type_inference.stratified_sample(series)
+    if sample.nunique() > REPEATED_RATIO * len(sample):
+        codes, values = None, series.astype(str).where(series.notna())
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        values = pd.Series(uniques, dtype=object).astype(str)
+    number_format = number_format or detect_number_format(values)
+    plain = not (number_format["thousands"] or number_format["currency"] or number_format["percent"]
+                 or number_format["parentheses"] or number_format["decimal"] != '.')
+    # Plain numbers need no rewriting unless some values carry stray characters
+    parsed = None
+    if plain:
+        parsed = pd.to_numeric(values.str.strip(), errors='coerce')
+        if not (parsed.notna() | values.isna()).all():
+            parsed = None
+    if parsed is None:
+        parsed = _normalize(values, number_format)
+    if codes is None:
+        return parsed
+    return _take(parsed, codes, series.index)
+
+
+def _take(parsed, codes, index):
+    """
+    Expand the parsed distinct values back to the rows; integers stay integers when nothing is missing.
+    """
+    if (codes >= 0).all() and parsed.notna().all():
+        return pd.Series(parsed.to_numpy()[codes], index=index)
+    values = np.append(parsed.to_numpy(dtype=float), np.nan)
+    # Missing values have code -1, which picks the trailing NaN
+    return pd.Series(values[codes], index=index)
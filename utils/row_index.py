@@ -0,0 +1,216 @@
+import os
+import json
+import logging
+import pandas as pd
+import utils.compression as compression
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+
+# A byte offset is recorded every ROW_INDEX_STEP data rows
+ROW_INDEX_STEP = int(os.getenv("ROW_INDEX_STEP", default="1000"))
+
+
+def index_path(file_path):
+    return str(file_path) + INDEX_SUFFIX
+
+
+def _is_ascii_compatible(encoding):
+    try:
+        return '\n,"'.encode(encoding) == b'\n,"'
+    except LookupError:
+        return False
+
+
+def count_lines(file_path, block_size=1024 * 1024):
+    """
+    Cheap line count by scanning raw bytes for newlines; quoted line breaks count as lines.
+    """
+    lines = 0
+    last_byte = b'\n'
+    with compression.open_stream(file_path) as file:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last_byte = block[-1:]
+    if last_byte != b'\n':
+        lines += 1
+    return lines
+
+
+def can_index(options):
+    """
+    Rows are split on raw bytes, which needs newline line ends and an ASCII-compatible encoding.
+    Compressed files cannot be indexed, byte offsets into them are not seekable.
+    """
+    encoding = options.get("encoding") or 'utf-8'
+    if options.get("compression"):
+        return False
+    return options.get("lineterminator") != '\r' and _is_ascii_compatible(encoding)
+
+
+class RowScanner:
+    """
+    Splits raw CSV lines into rows and records the byte offset of every step-th data row.
+
+    Rows spanning several lines inside quotes are handled by tracking quote parity,
+    blank lines are skipped and the lines up to the header row are not counted.
+    """
+
+    def __init__(self, options, step=ROW_INDEX_STEP):
+        encoding = options.get("encoding") or 'utf-8'
+        self.quote = (options.get("quotechar") or '"').encode(encoding)
+        self.header_lines = (options.get("header") or 0) + 1
+        self.step = step
+        self.header = b''
+        self.rows = 0
+        self.offsets = []
+        self.offset = 0
+        self._row = []
+        self._row_start = 0
+        self._row_blank = True
+        self._in_quotes = False
+
+    def feed(self, line):
+        """
+        Consume one raw line. Returns the bytes of the data row it completes, else None.
+        """
+        if not self._in_quotes:
+            self._row = []
+            self._row_start = self.offset
+            self._row_blank = not line.strip()
+        self._row.append(line)
+        if line.count(self.quote) % 2:
+            self._in_quotes = not self._in_quotes
+        self.offset += len(line)
+        if self._in_quotes or self._row_blank:
+            return None
+
+        row = b''.join(self._row)
+        if self.header_lines:
+            self.header_lines -= 1
+            self.header = row
+            return None
+        if self.rows % self.step == 0:
+            self.offsets.append(self._row_start)
+        self.rows += 1
+        return row
+
+    def to_index(self, columns):
+        return {
+            "step": self.step,
+            "rows": self.rows,
+            "columns": [str(col) for col in columns],
+            "offsets": self.offsets,
+        }
+
+
+def build_row_index(file_path, options, step=ROW_INDEX_STEP):
+    """
+    Scan a CSV/TXT file once and record the byte offset of every step-th data row.
+
+    options are the loader's csv options (encoding, sep, quotechar, header).
+    Returns the index dict, or None when the file cannot be indexed.
+    """
+    if not can_index(options):
+        return None
+
+    scanner = RowScanner(options, step)
+    with open(file_path, 'rb') as file:
+        for line in file:
+            scanner.feed(line)
+
+    columns = pd.read_csv(file_path, nrows=0, **options).columns
+    return save_row_index(file_path, scanner.to_index(columns))
+
+
+def save_row_index(file_path, index):
+    path = index_path(file_path)
+    with open(path + ".tmp", 'w') as file:
+        json.dump(index, file)
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def load_row_index(file_path):
+    """
+    Return the stored index when it is at least as new as the file, else None.
+    """
+    path = index_path(file_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(file_path):
+            return None
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_row_index(file_path):
+    path = index_path(file_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def read_rows(file_path, index, options, start, stop):
+    """
+    Parse only rows [start, stop) by seeking to the nearest indexed offset.
+    """
+    start = max(0, start)
+    stop = min(stop, index["rows"])
+    if start >= stop:
+        return pd.DataFrame(columns=index["columns"])
+
+    block = start // index["step"]
+    skip = start - block * index["step"]
+    read_options = {key: value for key, value in options.items() if key not in ["header", "on_bad_lines"]}
+
+    with open(file_path, 'rb') as file:
+        file.seek(index["offsets"][block])
+        data = pd.read_csv(
+            file,
+            header=None,
+            names=index["columns"],
+            nrows=skip + (stop - start),
+            on_bad_lines="skip",
+            **read_options,
+        )
+    return data.iloc[skip:].reset_index(drop=True)
+
+
+class IndexedRows:
+    """
+    Lazy, sliceable view over a dataset's rows backed by the row index.
+
+    It behaves like a list for Django's Paginator: count() comes from the index
+    and slicing parses only the requested page.
+    """
+
+    def __init__(self, file_path, index, options, formatter=None):
+        self.file_path = file_path
+        self.index = index
+        self.options = options
+        self.formatter = formatter or (lambda data: data.where(pd.notnull(data), None).to_dict(orient="records"))
+
+    def count(self):
+        return self.index["rows"]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.count())
+            return self.formatter(read_rows(self.file_path, self.index, self.options, start, stop))
+        if key < 0:
+            key += self.count()
+        if not 0 <= key < self.count():
+            raise IndexError("row index out of range")
+        return self.formatter(read_rows(self.file_path, self.index, self.options, key, key + 1))[0]
@@ -0,0 +1,132 @@
+import os
+import time
+import logging
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+NUMERIC = "numeric"
+DATETIME = "datetime"
+BOOLEAN = "boolean"
+STRING = "string"
+
+# Rows looked at per column before deciding
+TYPE_INFERENCE_SAMPLE_SIZE = int(os.getenv("TYPE_INFERENCE_SAMPLE_SIZE", default="1000"))
+# Share of parsable values needed to assign a type
+TYPE_INFERENCE_THRESHOLD = float(os.getenv("TYPE_INFERENCE_THRESHOLD", default="0.95"))
+# Sample rates between this and the threshold are ambiguous and trigger a full scan
+TYPE_INFERENCE_AMBIGUOUS = float(os.getenv("TYPE_INFERENCE_AMBIGUOUS", default="0.5"))
+
+# Plain, signed, thousands-separated (1,234.5 / 1.234,5 / 1 234,5), currency, percent and
+# (negative) numbers
+NUMERIC_PATTERN = (
+    r"[-+(]?\s*[$€£¥฿₩₹]?\s*[-+]?"
+    r"(?:(?:\d{1,3}(?:[,.'\s]\d{3})+|\d+)(?:[.,]\d+)?|[.,]\d+)(?:[eE][-+]?\d+)?"
+    r"\s*%?\s*[$€£¥฿₩₹]?\)?"
+)
+BOOLEAN_VALUES = {"true", "false", "yes", "no", "y", "n", "t", "f"}
+
+
+def stratified_sample(series, size=TYPE_INFERENCE_SAMPLE_SIZE):
+    """
+    Evenly spaced rows across the whole column, so head, middle and tail are all represented.
+    """
+    if len(series) <= size:
+        return series
+    positions = np.linspace(0, len(series) - 1, size).astype(int)
+    return series.iloc[positions]
+
+
+def parse_rates(values):
+    """
+    Share of non-null values that parse as numbers, dates and booleans.
+    """
+    text = values.dropna().astype(str).str.strip()
+    text = text[text != '']
+    if text.empty:
+        return {NUMERIC: 0.0, DATETIME: 0.0, BOOLEAN: 0.0}
+
+    numeric = text.str.fullmatch(NUMERIC_PATTERN)
+    boolean = text.str.lower().isin(BOOLEAN_VALUES)
+    # Numbers are not counted as dates, pandas would read them as epoch offsets
+    candidates = text[~numeric & ~boolean]
+    dates = 0
+    if not candidates.empty:
+        dates = pd.to_datetime(candidates, errors='coerce', format='mixed').notna().sum()
+    return {
+        NUMERIC: float(numeric.mean()),
+        DATETIME: float(dates / len(text)),
+        BOOLEAN: float(boolean.mean()),
+    }
+
+
+def _decide(rates):
+    kind = max(rates, key=rates.get)
+    if rates[kind] >= TYPE_INFERENCE_THRESHOLD:
+        return kind, rates[kind]
+    return STRING, 1.0 - rates[kind]
+
+
+def infer_column(series, sample_size=TYPE_INFERENCE_SAMPLE_SIZE):
+    """
+    Type of one column with a confidence score.
+
+    Typed columns are answered from their dtype. Text is classified on a stratified sample
+    and rescanned in full only when the sample is ambiguous.
+    """
+    start = time.perf_counter()
+    result = {"name": series.name, "sampled_rows": 0, "escalated": False, "rates": {}}
+
+    if pd.api.types.is_bool_dtype(series.dtype):
+        result.update(type=BOOLEAN, confidence=1.0)
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        result.update(type=NUMERIC, confidence=1.0)
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        result.update(type=DATETIME, confidence=1.0)
+    else:
+        sample = stratified_sample(series, sample_size)
+        rates = parse_rates(sample)
+        result["sampled_rows"] = len(sample)
+        best = max(rates.values())
+        if len(sample) < len(series) and TYPE_INFERENCE_AMBIGUOUS <= best < TYPE_INFERENCE_THRESHOLD:
+            rates = parse_rates(series)
+            result["escalated"] = True
+        kind, confidence = _decide(rates)
+        result.update(type=kind, confidence=round(confidence, 4), rates=rates)
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def infer_schema(data, sample_size=TYPE_INFERENCE_SAMPLE_SIZE):
+    """
+    Infer every column of a DataFrame. Returns {"columns": [...], "seconds": total}, each
+    column entry carries its type, confidence, parse rates and timing.
+    """
+    start = time.perf_counter()
+    columns = [infer_column(data[name], sample_size) for name in data.columns]
+    seconds = time.perf_counter() - start
+    logger.debug(
+        "Type inference took %.3fs: %s", seconds,
+        {str(column["name"]): round(column["seconds"], 4) for column in columns}
+    )
+    return {"columns": columns, "seconds": seconds}
+
+
+def column_summary(data, sample_size=TYPE_INFERENCE_SAMPLE_SIZE):
+    """
+    Numeric / object split of a dataset in the shape the dataset views return.
+    """
+    schema = infer_schema(data, sample_size)
+    return {
+        "count_header": len(data.columns),
+        "count_records": len(data),
+        "all_columns": data.columns.tolist(),
+        "numeric_columns": [column["name"] for column in schema["columns"] if column["type"] == NUMERIC],
+        "object_columns": [column["name"] for column in schema["columns"] if column["type"] != NUMERIC],
+    }
@@ -0,0 +1,222 @@
+# visualization/api/chart_renderer.py
+"""
+Chart drawing, run inside the render worker processes (see render_pool).
+
+Every renderer receives a plain spec dict of pre-aggregated values (lists, numbers and
+strings only, so it pickles cheaply) and returns the chart as PNG bytes.
+"""
+import io
+import os
+from contextlib import contextmanager
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+from matplotlib.ticker import ScalarFormatter, MaxNLocator
+import matplotlib.cm as cm
+import matplotlib.colors as mcolors
+
+color_graph = "#0346A5"
+# Part of the chart cache key, bump it whenever the drawing code changes the output
+STYLE_VERSION = 4
+SHAPEFILE_PATH = os.path.join(os.getcwd(), 'shapefiles', 'ne_110m_admin_0_countries.shp')
+# Shape identifier returned with data-only map charts
+GEOMETRY_ID_COLUMN = 'ADM0_A3'
+
+_world = None
+
+
+def load_world():
+    """
+    Country shapes, read once per process.
+    """
+    global _world
+    if _world is None:
+        import geopandas as gpd
+        _world = gpd.read_file(SHAPEFILE_PATH)
+    return _world
+
+
+@contextmanager
+def new_figure(figsize):
+    """
+    A Figure outside pyplot's registry, cleared on exit even when drawing fails,
+    so nothing outlives the render.
+    """
+    fig = Figure(figsize=figsize)
+    try:
+        yield fig
+    finally:
+        fig.clear()
+
+
+def _png(fig, transparent=True, **kwargs):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", transparent=transparent, **kwargs)
+    return buffer.getvalue()
+
+
+def _labels(ax, spec):
+    ax.set_xlabel(spec["x_label"])
+    ax.set_ylabel(spec["y_label"])
+    ax.set_title(spec["title"])
+
+
+def render_column_chart(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        ax.bar(spec["x"], spec["y"], color=color_graph, label=spec["label"])
+        _labels(ax, spec)
+        ax.legend()
+        return _png(fig)
+
+
+def render_bubble_chart(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        values = np.asarray(spec["y"], dtype=float)
+
+        # Normalize bubble size and clip it to avoid extreme sizes
+        bubble_size = np.clip(values * 10, 50, 2000)
+
+        # Normalize for color scale based on the sum
+        norm = mcolors.Normalize(min(values), max(values))
+        colors = matplotlib.colormaps['viridis'](norm(values))
+
+        ax.scatter(spec["x"], values, s=bubble_size, marker='o', c=colors, label=spec["label"])
+        _labels(ax, spec)
+
+        # Adjust y-axis limits dynamically based on data
+        ax.set_ylim([min(values) * 0.9, max(values) * 1.1])
+        ax.legend()
+        return _png(fig)
+
+
+def render_heatmap(spec):
+    with new_figure((15, 15)) as fig:
+        ax = fig.subplots()
+        image = ax.imshow(spec["matrix"], cmap='autumn', interpolation='nearest', vmin=spec["vmin"], vmax=spec["vmax"])
+        fig.colorbar(image, ax=ax)
+        _labels(ax, spec)
+        ax.set_ylim([0, 15])
+        return _png(fig)
+
+
+def render_area_chart(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        ax.fill_between(spec["x"], spec["y"], color=color_graph)
+        _labels(ax, spec)
+        return _png(fig)
+
+
+def render_histogram(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        if "bins" in spec:
+            # Bins counted by the caller, drawn as weights on the bin starts
+            ax.hist(spec["bins"][:-1], bins=spec["bins"], weights=spec["counts"], color=color_graph, rwidth=10)
+        else:
+            ax.bar(spec["categories"], spec["counts"], color=color_graph)
+        _labels(ax, spec)
+        return _png(fig)
+
+
+def render_scatter_plot(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        ax.scatter(spec["x"], spec["y"], marker='o', label=spec["label"], color=color_graph)
+        _labels(ax, spec)
+        ax.legend()
+        return _png(fig)
+
+
+def render_line_chart(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        ax.plot(spec["x"], spec["y"], marker='o', label=spec["label"], color=color_graph)
+        _labels(ax, spec)
+        ax.legend()
+        return _png(fig, transparent=False)
+
+
+def render_bar_chart(spec):
+    with new_figure((15, 8)) as fig:
+        ax = fig.subplots()
+        ax.barh(spec["x"], spec["y"], color=color_graph, label=spec["label"])
+        ax.set_ylabel(spec["x_label"])
+        ax.set_xlabel(spec["y_label"])
+        ax.set_title(spec["title"])
+        ax.legend()
+        return _png(fig)
+
+
+def render_pie_chart(spec):
+    with new_figure((8, 8)) as fig:
+        ax = fig.subplots()
+        ax.pie(spec["y"], labels=spec["x"], autopct='%1.1f%%')
+        ax.set_xlabel(spec["x_label"])
+        ax.set_title(spec["title"])
+        ax.legend()
+        return _png(fig)
+
+
+def render_donut_chart(spec):
+    with new_figure((8, 8)) as fig:
+        ax = fig.subplots()
+        ax.pie(spec["y"], labels=spec["x"], autopct='%1.1f%%', pctdistance=0.85)
+        # Adding Circle in Pie chart
+        ax.add_artist(Circle((0, 0), 0.50, fc='white'))
+        ax.set_xlabel(spec["x_label"])
+        ax.set_title(spec["title"])
+        ax.legend()
+        return _png(fig)
+
+
+def render_map_chart(spec):
+    world = load_world().rename(columns={spec["country_column"]: 'Country'})
+    world['Country'] = world['Country'].str.lower().str.strip()
+    values = dict(zip(spec["countries"], spec["values"]))
+    merged = world[world['Country'].isin(values.keys())].copy()
+    merged[spec["y_label"]] = merged['Country'].map(values)
+
+    vmin, vmax = min(spec["values"]), max(spec["values"])
+    with new_figure((12, 6)) as fig:
+        ax = fig.subplots()
+        sm = cm.ScalarMappable(cmap='Blues', norm=mcolors.Normalize(vmin=vmin, vmax=vmax))
+        sm.set_array([])
+
+        merged.plot(column=spec["y_label"], ax=ax, legend=False, cmap='Blues')
+
+        cbar = fig.colorbar(sm, ax=ax, orientation='vertical', shrink=0.6, aspect=25)
+        cbar.set_label(spec["y_label"], fontsize=12)
+        cbar.ax.yaxis.set_major_formatter(ScalarFormatter(useMathText=True))
+        cbar.ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        cbar.set_ticks([vmin, vmax])
+        cbar.set_ticklabels([f"{vmin:,.0f}", f"{vmax:,.0f}"])
+
+        ax.set_title(spec["title"], fontsize=18, fontweight='bold', pad=20)
+        ax.axis('off')
+        return _png(fig, dpi=300, bbox_inches='tight')
+
+
+RENDERERS = {
+    "column_chart": render_column_chart,
+    "bubble_chart": render_bubble_chart,
+    "heatmap": render_heatmap,
+    "area_chart": render_area_chart,
+    "histogram": render_histogram,
+    "scatter_plot": render_scatter_plot,
+    "line_chart": render_line_chart,
+    "bar_chart": render_bar_chart,
+    "pie_chart": render_pie_chart,
+    "donut_chart": render_donut_chart,
+    "map_chart": render_map_chart,
+}
+
+
+def render_chart(spec):
+    """
+    Draw the chart described by spec and return PNG bytes.
+    """
+    return RENDERERS[spec["chart"]](spec)
@@ -0,0 +1,73 @@
+# visualization/api/render_pool.py
+"""
+Pool of worker processes that draw charts, so matplotlib never runs in the request threads.
+"""
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from dotenv import load_dotenv
+from visualization.api import chart_renderer
+
+dotenv_path_dev = '.env'
+load_dotenv(dotenv_path=dotenv_path_dev)
+
+logger = logging.getLogger(__name__)
+
+# Worker processes; 0 renders in the calling process
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", default="2"))
+# Renders before a worker is replaced, caps the memory a worker can accumulate
+CHART_RENDER_MAX_TASKS = int(os.getenv("CHART_RENDER_MAX_TASKS", default="50"))
+# Seconds a single render may take
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", default="30"))
+# spawn keeps workers independent of the server's threads and open connections
+CHART_RENDER_START_METHOD = os.getenv("CHART_RENDER_START_METHOD", default="spawn")
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            context = multiprocessing.get_context(CHART_RENDER_START_METHOD)
+            _pool = context.Pool(processes=CHART_RENDER_WORKERS, maxtasksperchild=CHART_RENDER_MAX_TASKS)
+        return _pool
+
+
+def shutdown(pool=None):
+    """
+    Stop every worker; the next render starts a fresh pool.
+    With pool given, only stop it if it is still the current one.
+    """
+    global _pool
+    with _lock:
+        if _pool is not None and (pool is None or pool is _pool):
+            _pool.terminate()
+            _pool.join()
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+def render(spec, timeout=CHART_RENDER_TIMEOUT):
+    """
+    PNG bytes of the chart described by spec, or None when rendering failed or timed out.
+    """
+    if CHART_RENDER_WORKERS <= 0:
+        return chart_renderer.render_chart(spec)
+
+    pool = get_pool()
+    result = pool.apply_async(chart_renderer.render_chart, (spec,))
+    try:
+        return result.get(timeout=timeout)
+    except multiprocessing.TimeoutError:
+        # The stuck worker cannot be stopped alone, the pool is replaced
+        logger.error(f"Rendering {spec.get('chart')} timed out after {timeout}s, restarting the render pool")
+        shutdown(pool)
+    except Exception as e:
+        logger.error(f"Rendering {spec.get('chart')} failed: {e}")
+    return None
@@ -23,11 +23,17 @@ VISUALIZATION = (
     ('map_chart', 'map_chart')
 )
 
+OUTPUT_FORMATS = (
+    ('image', 'image'),
+    ('data', 'data')
+)
+
 class VisualizationSerializer(serializers.Serializer):
     chart_name = serializers.ChoiceField(choices=VISUALIZATION)
     x_axis = serializers.CharField(max_length=200)
     y_axis = serializers.CharField(max_length=200)
     file_id = serializers.CharField()  # Change file_uuid to file_id
+    format = serializers.ChoiceField(choices=OUTPUT_FORMATS, default='image')  # data: aggregated series only, no PNG
 
 
 class FindKPICategorySerializer(serializers.Serializer):
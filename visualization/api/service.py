@@ -3,24 +3,24 @@ import importlib
 from venv import logger
 from dotenv import load_dotenv
 from django.conf import settings
-import seaborn as sns
-import csv
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-import chardet
-import matplotlib
 import uuid
-import re
 import plotly.graph_objects as go
 import plotly.express as px
 import os
 import uuid
-import geopandas as gpd
-import matplotlib.pyplot as plt
-from matplotlib.ticker import ScalarFormatter
-import matplotlib.colors as mcolors
-matplotlib.use("Agg")
+import utils.dataset_loader as dataset_loader
+import utils.compact_dtypes as compact_dtypes
+import utils.type_inference as type_inference
+import utils.numeric_parser as numeric_parser
+import utils.chart_cache as chart_cache
+import utils.aggregate_cube as aggregate_cube
+import utils.group_kernel as group_kernel
+import utils.date_detection as date_detection
+import file.api.service as file_service
+from file.api.schema_service import SchemaService
+from visualization.api import chart_renderer, render_pool
 
 dotenv_path_dev = '.env'
 load_dotenv(dotenv_path=dotenv_path_dev)
@@ -31,6 +31,15 @@ file_base_url = os.getenv("BASE_URL_FILE")
 
 ALLOWED_EXTENSIONS_FILE = ['.csv', '.json', '.txt', '.xlsx']
 
+# Chart outputs: a rendered PNG or the aggregated series only
+IMAGE = "image"
+DATA = "data"
+
+# Charts built from find_sum, answerable from the aggregation cube
+CUBE_CHARTS = ["line_chart", "bar_chart", "scatter_plot", "bubble_chart", "column_chart", "waterfall"]
+# KPI aggregations the cube stores, by their name in the cube
+CUBE_KPI_AGGREGATIONS = {"sum": "sum", "average": "mean", "count": "count", "minimum": "min", "maximum": "max"}
+
 valid_chart_types = {
     'line_chart': (True, True),     # Requires both labels and numbers. 
     'histogram': (False, True),     # Requires only numbers.
@@ -51,99 +60,43 @@ def get_file_extension(filename):
     return extension
 
 
-def detect_delimiter(file_path):
-
-    with open(file_path, 'r') as file:
-        sample = file.read(1024)  # Read a sample of the file
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
-
-
-def load_dataset(filename):
-
+def load_dataset(filename, dialect=None, columns=None):
+    """
+    Load the dataset, parsing only columns when given (e.g. the chart axes).
+    """
     file_path = file_server_path_file+filename
-    type_file = get_file_extension(filename).replace('.', "").strip()
-    data = None
-
-    try:
-
-        with open(file_path, 'rb') as raw_data:
-            result = chardet.detect(raw_data.read(1000))
-        encoding = result['encoding']
-
-        if type_file == 'csv':
-            try:
-                data = pd.read_csv(file_path, encoding=encoding,
-                                   on_bad_lines="skip")
-            except UnicodeDecodeError:
-                data = pd.read_csv(file_path, encoding="latin1",
-                                   on_bad_lines="skip")
-
-        elif type_file == 'json':
-
-            try:
-                data = pd.read_json(file_path, encoding=encoding)
-
-            except Exception as e:
-
-                print(e)
-        elif type_file == 'txt':
-
-            data = pd.read_csv(file_path, encoding=encoding,
-                               delimiter=detect_delimiter(file_path))
-        elif type_file == 'xlsx':
-
-            data = pd.read_excel(file_path)
-
-    except FileNotFoundError as e:
-
-        print(e)
+    data = dataset_loader.load_dataframe(
+        file_path, dialect=dialect, columns=columns, compact=compact_dtypes.DATASET_COMPACT_DTYPES
+    )
 
     if data is not None and not data.empty:
 
-        data = data.where(pd.notnull(data), None)
-        data = data.apply(lambda x: x.astype(str) if x.dtype == 'float' else x)
-        for col in data.columns:
-            data.rename(columns={col: str(col).strip()}, inplace=True)
-
-        numeric_columns = view_type_load_dataset(data)["numeric_columns"]
-        for col in numeric_columns:
-            data[col]= pd.to_numeric(data[col].replace('[^0-9.]', '', regex=True), errors='coerce')
-        return data
+        # Native dtypes are kept; only numeric-looking text columns are parsed
+        data = dataset_loader.strip_column_names(data)
+        numeric_columns = stored_numeric_columns(filename, file_path, data.columns)
+        if numeric_columns is None:
+            numeric_columns = view_type_load_dataset(data)["numeric_columns"]
+        data = dataset_loader.coerce_numeric_columns(data, numeric_columns)
+        return dataset_loader.nulls_to_none(data)
 
     return None
 
-def view_type_load_dataset(data):
-
-    if data is not None:
-        numeric_columns = []
-        object_columns = []
-
-        for column in data.columns:
-            original_type = str(data[column].dtype)
+def stored_numeric_columns(filename, file_path, columns):
+    """
+    Numeric columns from the schema stored for this file version, None when not inferred yet.
+    """
+    version = dataset_loader.file_version(file_path)
+    schema = SchemaService().get_schema(filename, version) if version else None
+    if schema is None:
+        return None
+    return [col for col in schema["numeric_columns"] if col in columns]
 
-            if original_type == 'object':
 
-                numeric_values = data[column].astype(str).str.extract(r'(\d+)', expand=False)
-                if not numeric_values.dropna().empty:
+def view_type_load_dataset(data):
 
-                    if find_character(str(data[column].head(1).iloc[0])):
-                        object_columns.append(column)
-                    else:    
-                        numeric_columns.append(column)
-                else:
-                    object_columns.append(column)
-            else:
-                numeric_columns.append(column)
+    if data is not None:
+        return type_inference.column_summary(data)
 
-        return {
-            "count_header": len(data.columns),
-            "count_records": len(data),
-            "all_columns": data.columns.tolist(),
-            "numeric_columns": numeric_columns,
-            "object_columns": object_columns
-        }
-    
     return None
 
 
@@ -159,56 +112,110 @@ def generateBASEURL(str_url):
     return file_base_url+str_url+"/"
     
 
-def perform_visualize(filename, chart_name="bar_chart", x_axis=[None], y_axis=None):
-    # Ensure the filename is correct
-    data = load_dataset(filename)
+def chart_columns(*axes):
+    """
+    Column names referenced by the chart axes; an axis may be a name or a list of names.
+    """
+    columns = []
+    for axis in axes:
+        for col in axis if isinstance(axis, (list, tuple)) else [axis]:
+            if col and col not in columns:
+                columns.append(col)
+    return columns
+
+
+def image_name(url):
+    """
+    Image file name of a chart URL built by generateBASEURL.
+    """
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def perform_visualize(filename, chart_name="bar_chart", x_axis=[None], y_axis=None, dialect=None, content_hash=None, output=IMAGE):
+    """
+    Chart response for a file, chart and axes. Repeat requests for the same file content are
+    answered from the chart cache without loading the dataset.
+    With output=DATA only the aggregated series are returned, nothing is drawn or written.
+    """
+    if output == DATA:
+        return render_visualization(filename, chart_name, x_axis, y_axis, dialect=dialect, output=DATA)
+
+    content_id = content_hash or dataset_loader.file_version(file_server_path_file + filename)
+    key = chart_cache.chart_key(filename, content_id, chart_name, x_axis, y_axis, chart_renderer.STYLE_VERSION)
+    cached = chart_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = render_visualization(filename, chart_name, x_axis, y_axis, dialect=dialect, output=IMAGE)
+    if result and result.get("img"):
+        chart_cache.store(key, result, image_name(result["img"]))
+    return result
+
+
+def render_visualization(filename, chart_name="bar_chart", x_axis=[None], y_axis=None, dialect=None, output=IMAGE):
+    # Grouped sums come from the precomputed cube when it holds the axes, the dataset is not read
+    cube_sums = None
+    date_formats = {}
+    if chart_name in CUBE_CHARTS:
+        # Date categories are grouped as dates, parsed with the format stored in the schema
+        date_formats = {col: fmt for col, fmt in file_service.stored_date_formats(filename).items() if col == x_axis}
+        if not date_formats:
+            cube_sums = aggregate_cube.group_sum(file_server_path_file + filename, x_axis, y_axis)
+    if cube_sums is not None:
+        data = None
+    else:
+        # Only the axis columns are parsed
+        data = load_dataset(filename, dialect=dialect, columns=chart_columns(x_axis, y_axis))
+        data = date_detection.parse_date_columns(data, date_formats)
 
-    # Log the incoming request data for debugging purposes
-    logger.info(f"Received data: {data.head()}")
+        # Log the incoming request data for debugging purposes
+        logger.info(f"Received data: {data.head()}")
 
     # Based on the chart name, call the respective function
     if chart_name == "line_chart":
-        return generate_line_chart(data, x_axis, y_axis)
+        return generate_line_chart(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
 
     elif chart_name == "bar_chart":
-        return generate_bar_chart(data, x_axis, y_axis)
+        return generate_bar_chart(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
     
     elif chart_name == "pie_chart":
-        return generate_pie_chart(data, x_axis)
+        return generate_pie_chart(data, x_axis, output=output)
     
     elif chart_name == "scatter_plot":
-        return generate_scatter_plot(data, x_axis, y_axis)
+        return generate_scatter_plot(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
     
     elif chart_name == "histogram":
-        return generate_histogram(data, x_axis, y_axis)
+        return generate_histogram(data, x_axis, y_axis, output=output)
 
     elif chart_name == "area_chart":
-        return generate_area_chart(data, x_axis, y_axis)
+        return generate_area_chart(data, x_axis, y_axis, output=output)
     
     elif chart_name == "bubble_chart":
-        return generate_bubble_chart(data, x_axis, y_axis)
+        return generate_bubble_chart(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
 
     elif chart_name == "column_chart":
-        return generate_column_chart(data, x_axis, y_axis)
+        return generate_column_chart(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
     
     elif chart_name == "map_chart":
-        return generate_map_chart(data, x_axis, y_axis)
+        return generate_map_chart(data, x_axis, y_axis, output=output)
     
     elif chart_name == "donut_chart":
-        return generate_donut_chart(data, x_axis)
+        return generate_donut_chart(data, x_axis, output=output)
     
     elif chart_name == "heatmap":
-        return generate_heatmap_chart(data, x_axis, y_axis)
+        return generate_heatmap_chart(data, x_axis, y_axis, output=output)
     
     elif chart_name == "waterfall":
-        return generate_waterfall(data, x_axis, y_axis)
+        return generate_waterfall(data, x_axis, y_axis, output=output, cube_sums=cube_sums)
 
     return None
 
 
-def generate_waterfall(data, x_axis, y_axis):
+def generate_waterfall(data, x_axis, y_axis, output=IMAGE, cube_sums=None):
     if x_axis and y_axis:
-        counts = find_sum(data, x_axis, y_axis).head(10)
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums)
+        if output == DATA:
+            return chart_data(chart_spec("waterfall", counts, x_axis, y_axis))
 
         fig = go.Figure(go.Waterfall(
             name="20", orientation="v",
@@ -240,81 +247,71 @@ def generate_waterfall(data, x_axis, y_axis):
 
     return None
    
-def generate_column_chart(data, x_axis, y_axis):
-    
-    if x_axis:
+def chart_spec(chart, counts, x_axis, y_axis, value="sum"):
+    """
+    Plain-list description of an aggregated chart, as sent to the render workers.
+    """
+    return {
+        "chart": chart,
+        "x": counts[str(x_axis)].tolist(),
+        "y": counts[value].tolist(),
+        "x_label": str(x_axis),
+        "y_label": "sum of "+str(y_axis),
+        "title": f"{x_axis} and {y_axis}",
+        "label": x_axis,
+    }
 
-        plt.figure(figsize=(15, 8))  # Increased figure size
-        # for x in x_axis:
-        counts = find_sum(data, x_axis, y_axis).head(10)
-        plt.bar(counts[str(x_axis)], counts["sum"], color=color_graph, label=x_axis)  
-        plt.xlabel(str(x_axis))  # Set generic x-label
-        plt.ylabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        plt.legend()  # Add legend if multiple lines
 
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
+def chart_data(spec):
+    """
+    Data-only chart response: the aggregated series the front end draws itself.
+    """
+    data = {key: value for key, value in spec.items() if key not in ["country_column"]}
+    return {"_id": str(uuid.uuid4().hex), "format": DATA, **data}
 
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
 
-    return None
+def finish_chart(spec, output=IMAGE):
+    if output == DATA:
+        return chart_data(spec)
+    return save_chart(spec)
+
+
+def save_chart(spec):
+    """
+    Render spec in the worker pool and store the image; None when rendering failed.
+    """
+    png = render_pool.render(spec)
+    if png is None:
+        return None
 
-def generate_bubble_chart(data,x_axis,y_axis):
+    filename_visualize = uuid.uuid4().hex + ".png"
+    image_path = os.path.join(file_server_path_image, filename_visualize)
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    with open(image_path, "wb") as image:
+        image.write(png)
 
+    return {
+        "_id":str(uuid.uuid4().hex),
+        "img": generateBASEURL(filename_visualize)
+    }
+
+def generate_column_chart(data, x_axis, y_axis, output=IMAGE, cube_sums=None):
+    
     if x_axis:
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums)
+        return finish_chart(chart_spec("column_chart", counts, x_axis, y_axis), output)
 
-        # Create a new figure
-        plt.figure(figsize=(15, 8)) 
-        
-        # Get the aggregated data
-        counts = find_sum(data, x_axis, y_axis)
-
-        # Normalize bubble size and clip it to avoid extreme sizes
-        bubble_size = counts["sum"] * 10  # Scale the bubble size (adjust multiplier as needed)
-        bubble_size = np.clip(bubble_size, 50, 2000)  # Avoid very small or very large bubbles
-
-        # Normalize for color scale based on 'sum'
-        norm = plt.Normalize(min(counts["sum"]), max(counts["sum"]))  
-        colors = plt.cm.viridis(norm(counts["sum"]))  # Using 'viridis' colormap
-
-        # Create the scatter plot (Bubble chart)
-        plt.scatter(
-            counts[str(x_axis)], 
-            counts["sum"],  
-            s=bubble_size,  # Size of the bubble
-            marker='o', 
-            c=colors,  # Color based on 'sum'
-            label=x_axis
-        )
+    return None
 
-        # Add labels and title
-        plt.xlabel(str(x_axis))   
-        plt.ylabel("sum of " + str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        
-        # Adjust y-axis limits dynamically based on data
-        plt.ylim([min(counts["sum"]) * 0.9, max(counts["sum"]) * 1.1])
-        
-        # Show legend
-        plt.legend()
-
-        # Save the plot to file
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize, transparent=True)
+def generate_bubble_chart(data,x_axis,y_axis, output=IMAGE, cube_sums=None):
 
-        # Return the image URL
-        return {
-            "_id": str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+    if x_axis:
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums)
+        return finish_chart(chart_spec("bubble_chart", counts, x_axis, y_axis), output)
 
     return None
 
-def generate_heatmap_chart(data, x_axis, y_axis):
+def generate_heatmap_chart(data, x_axis, y_axis, output=IMAGE):
     if x_axis and y_axis:
 
         # Filter out rows where either column contains non-numeric values
@@ -323,145 +320,82 @@ def generate_heatmap_chart(data, x_axis, y_axis):
 
         # Drop rows with NaN values after coercion
         data_clean = data.dropna(subset=[x_axis, y_axis])
-
-        # Create the heatmap
-        plt.figure(figsize=(15, 15)) 
-        counts = find_sum(data_clean, x_axis, y_axis)
         df = pd.concat([data_clean[x_axis].astype(float), data_clean[y_axis].astype(float)], axis=1)
-
-        # Create heatmap
-        plt.imshow(df, cmap='autumn', interpolation='nearest')
-        plt.colorbar()
-
-        plt.xlabel(str(x_axis))   
-        plt.ylabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        plt.ylim([0, 15])
-
-        # Optionally, you can add a legend if you have multiple lines or categories
-        plt.legend()  # This might be unnecessary for a heatmap, unless you're plotting multiple series
-
-        # Save the image
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize, transparent=True)
-
-        return {
-            "_id": str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        if df.empty:
+            return None
+
+        # Only the rows inside the y limits are drawn, the color scale still spans all rows
+        return finish_chart({
+            "chart": "heatmap",
+            "matrix": df.head(16).values.tolist(),
+            "vmin": float(df.values.min()),
+            "vmax": float(df.values.max()),
+            "x_label": str(x_axis),
+            "y_label": "sum of "+str(y_axis),
+            "title": f"{x_axis} and {y_axis}",
+        }, output)
 
     return None
 
-def generate_area_chart(data , x_axis , y_axis):
+def generate_area_chart(data , x_axis , y_axis, output=IMAGE):
 
     if x_axis:
-
-        plt.figure(figsize=(15, 8)) 
-        plt.fill_between(data[x_axis].head(10), data[y_axis].head(10), color=color_graph)
-        plt.xlabel(str(x_axis)) 
-        plt.ylabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-
-
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        x, y = data[x_axis].head(10), data[y_axis].head(10)
+        # NaN is not valid JSON and leaves a gap in the fill, missing points are dropped
+        present = x.notna() & y.notna()
+        return finish_chart({
+            "chart": "area_chart",
+            "x": x[present].tolist(),
+            "y": y[present].tolist(),
+            "x_label": str(x_axis),
+            "y_label": "sum of "+str(y_axis),
+            "title": f"{x_axis} and {y_axis}",
+        }, output)
 
     return None
 
-def generate_histogram(data, x_axis, y_axis=None):
+def generate_histogram(data, x_axis, y_axis=None, output=IMAGE):
 
     if x_axis:
-
-        plt.figure(figsize=(15, 8))
-        data_to_plot = data[x_axis]
-        plt.hist(data_to_plot, bins=15, color=color_graph, rwidth=10)  # Set rwidth to 1.0
-
-        plt.xlabel(x_axis)  # Set x-label
-        plt.ylabel("Frequency")  # Y-label represents the frequency
-        plt.title(f"Histogram of {x_axis}")
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-
-        plt.close()  # Close the current figure to avoid displaying it immediately
-    
-        return {
-            "_id": str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
+        spec = {
+            "chart": "histogram",
+            "x_label": x_axis,
+            "y_label": "Frequency",
+            "title": f"Histogram of {x_axis}",
         }
+        values = data[x_axis].dropna()
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            counts, edges = np.histogram(values, bins=15)
+            spec.update(counts=counts.tolist(), bins=edges.tolist())
+        else:
+            counts = values.astype(str).value_counts(sort=False)
+            spec.update(categories=counts.index.tolist(), counts=counts.tolist())
+        return finish_chart(spec, output)
     
     return None
     
-def generate_scatter_plot(data,x_axis,y_axis):
+def generate_scatter_plot(data,x_axis,y_axis, output=IMAGE, cube_sums=None):
     
     if x_axis:
-
-        plt.figure(figsize=(15, 8)) 
-        counts = find_sum(data, x_axis, y_axis)
-        plt.scatter(counts[str(x_axis)], counts["sum"], marker='o', label=x_axis,color=color_graph)  
-
-        plt.xlabel(str(x_axis))  # Set generic x-label
-        plt.ylabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        plt.legend()  # Add legend if multiple lines
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-
-    
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums)
+        return finish_chart(chart_spec("scatter_plot", counts, x_axis, y_axis), output)
 
     return None
 
-def generate_line_chart(data, x_axis, y_axis):
+def generate_line_chart(data, x_axis, y_axis, output=IMAGE, cube_sums=None):
     
     if x_axis:
-
-        plt.figure(figsize=(15, 8)) 
-        counts = find_sum(data, x_axis, y_axis)
-        plt.plot(counts[str(x_axis)], counts["sum"], marker='o', label=x_axis,color=color_graph)  
-        plt.xlabel(str(x_axis))  
-        plt.ylabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        plt.legend()  
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=False)
-
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        # The largest groups, joined in axis order
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums, by_key=True)
+        return finish_chart(chart_spec("line_chart", counts, x_axis, y_axis), output)
 
     return None
     
-def generate_bar_chart(data, x_axis, y_axis):
+def generate_bar_chart(data, x_axis, y_axis, output=IMAGE, cube_sums=None):
     
     if x_axis:
-
-        plt.figure(figsize=(15, 8)) 
-        counts = find_sum(data, x_axis, y_axis).head(10)
-        plt.barh(counts[str(x_axis)],counts["sum"],color=color_graph, label=x_axis)  
-        plt.ylabel(str(x_axis)) 
-        plt.xlabel("sum of "+str(y_axis))
-        plt.title(f"{x_axis} and {y_axis}")
-        plt.legend()  
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-
-
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        counts = find_sum(data, x_axis, y_axis, cube_sums=cube_sums)
+        return finish_chart(chart_spec("bar_chart", counts, x_axis, y_axis), output)
 
     return None
 
@@ -470,7 +404,7 @@ def generate_card_KPI_NUMBER(data, aggregation, field):
         if field not in data.columns:
             raise ValueError(f"Field '{field}' not found in the dataset.")
 
-        data[field] = pd.to_numeric(data[field], errors='coerce')
+        data[field] = numeric_parser.parse_numbers(data[field])
         data = data.dropna(subset=[field])  
         print(data[field])
 
@@ -500,62 +434,35 @@ def generate_card_KPI_NUMBER(data, aggregation, field):
         print(f"Error in generate_card_KPI_NUMBER: {e}")
         return None
 
-def generate_pie_chart(data, x_axis):
+def generate_pie_chart(data, x_axis, output=IMAGE):
     
     if x_axis:
-
-        plt.figure(figsize=(8, 8)) 
         counts = find_sum_category(data, x_axis)
-        plt.pie(counts["count"],labels=counts[str(x_axis)],autopct='%1.1f%%')  
-
-        plt.xlabel(str(x_axis))  
-        plt.title(f"{x_axis}")
-        plt.legend()  
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        spec = chart_spec("pie_chart", counts, x_axis, None, value="count")
+        spec["title"] = str(x_axis)
+        return finish_chart(spec, output)
 
     return None
 
-def generate_donut_chart(data, x_axis):
+def generate_donut_chart(data, x_axis, output=IMAGE):
     
     if x_axis:
-
-        plt.figure(figsize=(8, 8)) 
         counts = find_sum_category(data, x_axis)
-        plt.pie(counts["count"],labels=counts[str(x_axis)],autopct='%1.1f%%',pctdistance=0.85,)  
-        centre_circle = plt.Circle((0, 0), 0.50, fc='white')
-        fig = plt.gcf()
-        
-        # Adding Circle in Pie chart
-        fig.gca().add_artist(centre_circle)
-        plt.xlabel(str(x_axis))  
-        plt.title(f"{x_axis}")
-        plt.legend()  
-
-        filename_visualize = uuid.uuid4().hex + ".png"
-        plt.savefig(file_server_path_image + filename_visualize,transparent=True)
-        return {
-            "_id":str(uuid.uuid4().hex),
-            "img": generateBASEURL(filename_visualize)
-        }
+        spec = chart_spec("donut_chart", counts, x_axis, None, value="count")
+        spec["title"] = str(x_axis)
+        return finish_chart(spec, output)
 
     return None
 
-
-def generate_map_chart(data, x_axis, y_axis):
+def generate_map_chart(data, x_axis, y_axis, output=IMAGE):
     if not x_axis or not y_axis:
         return {"error": "Both x_axis and y_axis must be provided."}
 
-    shapefile_path = os.path.join(os.getcwd(), 'shapefiles', 'ne_110m_admin_0_countries.shp')
+    shapefile_path = chart_renderer.SHAPEFILE_PATH
     if not os.path.exists(shapefile_path):
         return {"error": f"Shapefile not found at {shapefile_path}"}
 
-    world = gpd.read_file(shapefile_path)
+    world = chart_renderer.load_world()
     country_col = find_location_column(world)
     if not country_col:
         return {"error": f"No valid country column found in the shapefile. Columns: {world.columns.tolist()}"}
@@ -564,13 +471,14 @@ def generate_map_chart(data, x_axis, y_axis):
     if not location_column:
         return {"error": f"Location column '{x_axis}' not found in the data."}
 
-    world = world.rename(columns={country_col: 'Country'})
+    id_columns = [col for col in [chart_renderer.GEOMETRY_ID_COLUMN] if col in world.columns and col != country_col]
+    countries = world[[country_col] + id_columns].rename(columns={country_col: 'Country'})
     data = data.rename(columns={location_column: 'Country'})
     
     data['Country'] = data['Country'].str.lower().str.strip()
-    world['Country'] = world['Country'].str.lower().str.strip()
+    countries['Country'] = countries['Country'].str.lower().str.strip()
 
-    merged = world.merge(data, on='Country', how='left')
+    merged = countries.merge(data, on='Country', how='left')
 
     if merged[y_axis].isnull().all():
         return {"error": "No matches found between dataset countries and the shapefile."}
@@ -578,33 +486,21 @@ def generate_map_chart(data, x_axis, y_axis):
     merged = merged.dropna(subset=[y_axis])
     merged = merged.sort_values(by=y_axis, ascending=False)
 
-    fig, ax = plt.subplots(1, 1, figsize=(12, 6))
-    norm = mcolors.Normalize(vmin=merged[y_axis].min(), vmax=merged[y_axis].max())
-    sm = plt.cm.ScalarMappable(cmap='Blues', norm=norm)
-    sm.set_array([])
-
-    im = merged.plot(column=y_axis, ax=ax, legend=False, cmap='Blues')
-
-    cbar = plt.colorbar(sm, ax=ax, orientation='vertical', shrink=0.6, aspect=25)
-    cbar.set_label(y_axis, fontsize=12)
-    cbar.ax.yaxis.set_major_formatter(ScalarFormatter(useMathText=True))
-    cbar.ax.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-    cbar.set_ticks([merged[y_axis].min(), merged[y_axis].max()])
-    cbar.set_ticklabels([f"{merged[y_axis].min():,.0f}", f"{merged[y_axis].max():,.0f}"])
-    
-    ax.set_title(f"{y_axis} Distribution by Country", fontsize=18, fontweight='bold', pad=20)
-    ax.axis('off')
-
-    filename_visualize = f"{uuid.uuid4().hex}.png"
-    image_path = os.path.join(file_server_path_image, filename_visualize)
-    os.makedirs(os.path.dirname(image_path), exist_ok=True)
-
-    plt.savefig(image_path, transparent=True, dpi=300, bbox_inches='tight')
-    plt.close()
+    # The worker draws the shapes, only country names, shape ids and values are sent
+    chart = finish_chart({
+        "chart": "map_chart",
+        "country_column": country_col,
+        "countries": merged['Country'].tolist(),
+        "geometry_ids": merged[id_columns[0] if id_columns else 'Country'].tolist(),
+        "values": merged[y_axis].astype(float).tolist(),
+        "y_label": y_axis,
+        "title": f"{y_axis} Distribution by Country",
+    }, output)
+    if chart is None:
+        return None
 
     return {
-        "_id": str(uuid.uuid4().hex),
-        "img": generateBASEURL(filename_visualize),
+        **chart,
         "metadata": {
             "x_axis": x_axis,
             "y_axis": y_axis,
@@ -643,13 +539,13 @@ def generate_card_KPI_CATEGORY(data,aggregation,field):
     
 def find_sum_category(data,x_axis):
     
-    value_counts=data[x_axis].value_counts().reset_index()
-    return value_counts.head(10)
+    return group_kernel.group_totals(data[x_axis])
 
 def find_first_category(data, fiels):
 
     try:
-        return data[fiels].iloc[0]
+        value = data[fiels].iloc[0]
+        return None if pd.isna(value) else value
 
     except Exception as e:
         print(e)
@@ -658,7 +554,8 @@ def find_first_category(data, fiels):
 def find_last_category(data,fiels):
 
     try:
-        return data[fiels].iloc[len(data)-1]
+        value = data[fiels].iloc[len(data)-1]
+        return None if pd.isna(value) else value
 
     except Exception as e:
         print(e)
@@ -667,9 +564,9 @@ def find_last_category(data,fiels):
 def find_count_disinct(data,fiels):
     return data[str(fiels)].nunique()
 
-def find_KPI_CATEGORY(filename, chart_name,aggregation,fields):
+def find_KPI_CATEGORY(filename, chart_name,aggregation,fields, dialect=None):
 
-    data = load_dataset(filename)
+    data = load_dataset(filename, dialect=dialect, columns=chart_columns(fields))
     list_data = []
 
     for field in fields:
@@ -685,13 +582,31 @@ def find_KPI_CATEGORY(filename, chart_name,aggregation,fields):
 
     return list_data
 
-def find_KPI_NUMBER (filename, chart_name,aggregation,fields):
+def cube_totals(filename, aggregation, fields):
+    """
+    Whole-column KPI values from the aggregation cube, or None when any field is missing from it.
+    """
+    if aggregation not in CUBE_KPI_AGGREGATIONS:
+        return None
+    file_path = file_server_path_file + filename
+    totals = {field: aggregate_cube.column_total(file_path, field, CUBE_KPI_AGGREGATIONS[aggregation]) for field in fields}
+    if any(value is None for value in totals.values()):
+        return None
+    return totals
+
+def find_KPI_NUMBER (filename, chart_name,aggregation,fields, dialect=None):
 
-    data = load_dataset(filename)
+    totals = cube_totals(filename, aggregation, fields)
+    data = None
+    if totals is None:
+        data = load_dataset(filename, dialect=dialect, columns=chart_columns(fields))
     list_data = []
     for field in fields:
         if chart_name == "card":
-            result = generate_card_KPI_NUMBER(data, aggregation, field)
+            if totals is not None:
+                result = totals[field]
+            else:
+                result = generate_card_KPI_NUMBER(data, aggregation, field)
             response = {}
             response["value"] = "{:.2f}".format(result) 
             response["aggregation"]=aggregation
@@ -700,13 +615,14 @@ def find_KPI_NUMBER (filename, chart_name,aggregation,fields):
     
     return list_data
 
-def find_sum(data, category_column, value_column):
+def find_sum(data, category_column, value_column, cube_sums=None, by_key=False):
 
-    data[value_column] = data[value_column].replace(r'[^\d.]+', '', regex=True)
-    data[value_column] = pd.to_numeric(data[value_column], errors='coerce')
-    
-    grouped_data = data.groupby(category_column)[value_column].sum().reset_index(name="sum")
-    return grouped_data.head(10)
+    # Per-category sums read from the aggregation cube, only the top groups are picked
+    if cube_sums is not None:
+        return group_kernel.top_groups(cube_sums[category_column], cube_sums["sum"], category_column, by_key=by_key)
+
+    data = dataset_loader.coerce_numeric_columns(data, [value_column])
+    return group_kernel.group_totals(data[category_column], data[value_column], by_key=by_key)
 
 
 def find_range_of_dataset(size):
@@ -714,45 +630,11 @@ def find_range_of_dataset(size):
     values_only = [size * (i / 100) for i in range(0, 101, 10)]  
     return values_only
 
-def view_type_dataset(filename):
-
-    data = load_dataset(filename)
-    if data is not None:
-        numeric_columns = []
-        object_columns = []
-
-        for column in data.columns:
-            original_type = str(data[column].dtype)
-
-            if original_type == 'object':
+def view_type_dataset(filename, dialect=None):
 
-                numeric_values = data[column].astype(str).str.extract(r'(\d+)', expand=False)
-                if not numeric_values.dropna().empty:
+    # Answered from the stored schema, the data file is only read the first time
+    schema = file_service.get_schema(filename, dialect=dialect)
+    if schema is not None:
+        return file_service.type_summary(schema)
 
-                    if find_character(str(data[column].head(1).iloc[0])):
-                        object_columns.append(column)
-                    else:    
-                        numeric_columns.append(column)
-                else:
-                    object_columns.append(column)
-            else:
-                numeric_columns.append(column)
-
-        return {
-            "count_header": len(data.columns),
-            "count_records": len(data),
-            "all_columns": data.columns.tolist(),
-            "numeric_columns": numeric_columns,
-            "object_columns": object_columns
-        }
-    
     return None
-
-def find_character(text):
-
-    regex_pattern = r'[A-Za-z]'
-    matches = re.findall(regex_pattern, text)
-
-    if matches: 
-        return True
-    return False
\ No newline at end of file
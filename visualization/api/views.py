@@ -31,8 +31,9 @@ class VisualizationApiView(APIView):
             chart_name = serializer.validated_data.get("chart_name")
             x_axis = serializer.validated_data.get("x_axis")
             y_axis = serializer.validated_data.get("y_axis")
+            output = serializer.validated_data.get("format")
             
-            image_path = perform_visualize(filename=filename, chart_name=chart_name, x_axis=x_axis, y_axis=y_axis)
+            image_path = perform_visualize(filename=filename, chart_name=chart_name, x_axis=x_axis, y_axis=y_axis, dialect=file.get_dialect(), content_hash=file.content_hash, output=output)
 
             if image_path:
                 return Response(image_path, status=status.HTTP_200_OK)
@@ -57,7 +58,7 @@ class ViewTypeDataset(APIView):
             )
         file = get_object_or_404(File, _id=ObjectId(file_id))
         filename = file.filename
-        data_type_dataset = view_type_dataset(filename)
+        data_type_dataset = view_type_dataset(filename, dialect=file.get_dialect())
 
         if data_type_dataset:
             return Response({"data":data_type_dataset},status=status.HTTP_200_OK)
@@ -87,9 +88,9 @@ class FindKPIView(APIView):
             
             result = None
             if serializer.validated_data.get("type_field") == "number":
-                result = find_KPI_NUMBER(filename, chart_name, aggregation, fields)
+                result = find_KPI_NUMBER(filename, chart_name, aggregation, fields, dialect=file.get_dialect())
             elif serializer.validated_data.get("type_field") == "category":
-                result = find_KPI_CATEGORY(filename, chart_name, aggregation, fields)
+                result = find_KPI_CATEGORY(filename, chart_name, aggregation, fields, dialect=file.get_dialect())
             
             if result:
                 logger.info(f"KPI result: {result}")
@@ -1,3 +1,63 @@
-from django.test import TestCase
+import gc
+import json
+import resource
+from django.test import SimpleTestCase
 
-# Create your tests here.
+import pandas as pd
+
+from visualization.api import chart_renderer
+import visualization.api.service as service
+
+
+def rss_kb():
+    """
+    Current resident set size of this process in KB.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() // 1024
+    except OSError:
+        # No procfs (macOS): fall back to the peak, which still grows with a leak
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class ChartRendererMemoryTest(SimpleTestCase):
+    CHARTS = 1000
+    # A leaked 15x8 figure costs well over 100 KB, 1,000 of them would exceed this
+    MAX_GROWTH_KB = 50 * 1024
+
+    def spec(self, index):
+        return {
+            "chart": ["bar_chart", "line_chart", "column_chart", "pie_chart"][index % 4],
+            "x": [f"category {i}" for i in range(10)],
+            "y": [float(i * index % 97) + 1 for i in range(10)],
+            "x_label": "category",
+            "y_label": "sum of value",
+            "title": f"chart {index}",
+            "label": "category",
+        }
+
+    def test_rss_stays_flat_over_many_renders(self):
+        # Warm-up: font cache, colormaps and renderer buffers are allocated once
+        for index in range(50):
+            chart_renderer.render_chart(self.spec(index))
+        gc.collect()
+        baseline = rss_kb()
+
+        for index in range(self.CHARTS):
+            png = chart_renderer.render_chart(self.spec(index))
+            self.assertTrue(png.startswith(b"\x89PNG"))
+        gc.collect()
+
+        self.assertLess(rss_kb() - baseline, self.MAX_GROWTH_KB)
+
+
+class AreaChartDataTest(SimpleTestCase):
+
+    def test_missing_points_are_dropped_from_the_data_spec(self):
+        data = pd.DataFrame({"month": ["jan", "feb", None, "apr"], "value": [1.0, float("nan"), 3.0, 4.0]})
+        spec = service.generate_area_chart(data, "month", "value", output=service.DATA)
+
+        self.assertEqual((spec["x"], spec["y"]), (["jan", "apr"], [1.0, 4.0]))
+        json.dumps(spec, allow_nan=False)